@@ -0,0 +1,147 @@
+# bench.py
+# Benchmarks for the data-shaping steps in shaping.py at several log sizes.
+# Each run is saved under .childtracker/bench/ and compared with the previous
+# one; a case that got slower than --threshold times its last result is
+# reported as a regression and the run exits 1.
+#
+#   python bench.py
+#   python bench.py --sizes 10000 100000 --repeat 3
+#   python bench.py --sql   # also time the indexed SQLite backend (sql_db.py)
+import argparse
+import datetime
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from formats import DATE_FORMAT, format_timestamp
+from shaping import (assignments_frame, staff_children, notes_by_name, note_rows, logs_on_date,
+                     newest_first, todays_memo, count_by_staff, log_counts)
+
+RESULTS_DIR = os.path.join(".childtracker", "bench")
+SIZES = [10_000, 100_000, 1_000_000]
+STAFF_COUNT = 50
+CHILDREN_PER_STAFF = 4
+
+
+# --- SEED DATA ---
+def generate(logs_count, rng):
+    names = [f"Staff {i:02d}" for i in range(1, STAFF_COUNT + 1)]
+    assignments = {}
+    for i, name in enumerate(names):
+        for c in range(CHILDREN_PER_STAFF):
+            assignments[f"a{i:03d}{c:02d}"] = {"staff": name, "child": f"Child {i:02d}-{c:02d}", "child_id": f"c{i:03d}{c:02d}"}
+    children = list(assignments.values())
+    today = datetime.date(2025, 7, 14)
+    memos = {f"m{d:03d}{i:03d}": {"staff": name, "date": (today - datetime.timedelta(days=d)).isoformat(), "memo": "Bench memo"}
+             for d in range(30) for i, name in enumerate(names)}
+    # Spread the logs over a summer so a date filter matches a realistic slice.
+    start = datetime.datetime(2025, 6, 2, 8, 0)
+    step = datetime.timedelta(days=60) / logs_count
+    logs = {}
+    for n in range(logs_count):
+        stamp = format_timestamp(start + step * n)
+        child = rng.choice(children)
+        logs[f"l{n:07d}"] = {"timestamp": stamp, "action": rng.choice(["Note", "Ate", "Hydration", "Move", "Incident"]),
+                             "staff": rng.choice(names), "child": child["child"], "child_id": child["child_id"], "notes": "Seeded"}
+    return {"names": names, "assignments": assignments, "logs": logs, "memos": memos, "today": today}
+
+
+def cases(data):
+    """name -> zero-argument callable, one per hot path in main.py."""
+    date_str = data["today"].strftime(DATE_FORMAT)
+    assignments_df = assignments_frame(data["assignments"])
+    day_logs = logs_on_date(data["logs"], date_str)
+    return {
+        "assignments_frame": lambda: assignments_frame(data["assignments"]),
+        "staff_children": lambda: [staff_children(assignments_df, name) for name in data["names"]],
+        "child_notes": lambda: note_rows(notes_by_name(data["logs"], "Child 07-02")),
+        "logs_on_date": lambda: logs_on_date(data["logs"], date_str),
+        "newest_first": lambda: newest_first(day_logs),
+        "todays_memo": lambda: [todays_memo(data["memos"], name, data["today"].isoformat()) for name in data["names"]],
+        "admin_groupby": lambda: (count_by_staff(assignments_df), log_counts(day_logs)),
+    }
+
+
+def sql_cases(data, path):
+    """The same lookups answered by the SQLite backend's indexes."""
+    import sql_db
+
+    sql_db.connect(path)
+    sql_db.reference("/").set({"assignments": data["assignments"], "logs": data["logs"], "memos": data["memos"]})
+    repo = sql_db.SqlRepository([])
+    day = datetime.datetime.combine(data["today"], datetime.time())
+    date_str = data["today"].strftime(DATE_FORMAT)
+    return {
+        "sql_child_notes": lambda: note_rows(repo.child_logs("c00702", ["Note", "Incident"])),
+        "sql_logs_on_date": lambda: logs_on_date(repo.logs_between(day, day + datetime.timedelta(days=1)), date_str),
+    }
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+# --- RESULTS ---
+def previous_results():
+    runs = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    if not runs:
+        return {}
+    with open(runs[-1]) as f:
+        return json.load(f)["results"]
+
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S-%f}.json")
+    with open(path, "w") as f:
+        json.dump({"saved": datetime.datetime.now().isoformat(timespec="seconds"), "results": results}, f, indent=1)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the data-shaping hot paths at several log sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="log row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (best is kept)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown vs the previous run counted as a regression")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sql", action="store_true", help="also time the SQLite backend")
+    args = parser.parse_args()
+
+    previous = previous_results()
+    results = {}
+    regressions = []
+    for size in args.sizes:
+        data = generate(size, random.Random(args.seed))
+        print(f"{size:,} logs")
+        timed = cases(data)
+        if args.sql:
+            timed.update(sql_cases(data, os.path.join(tempfile.mkdtemp(), "bench.sqlite")))
+        for name, fn in timed.items():
+            key = f"{name}[{size}]"
+            ms = best_of(fn, args.repeat) * 1000
+            results[key] = ms
+            line = f"  {name:<20} {ms:>10.2f} ms"
+            if key in previous:
+                ratio = ms / previous[key] if previous[key] else 1.0
+                line += f"   {ratio:>5.2f}x previous"
+                if ratio > args.threshold:
+                    line += "   REGRESSION"
+                    regressions.append(key)
+            print(line)
+
+    print(f"saved {save_results(results)}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# center_dashboard.py
+# Data for the read-only front-desk display (main.py?view=dashboard): every
+# staff member's location and child count, their last headcount today, and
+# today's incidents. Built once per change of the underlying nodes and shared
+# by every screen watching.
+import datetime
+
+from formats import DATE_FORMAT, parse_timestamp
+
+
+def build_dashboard(staff, assignments, logs, incidents, day):
+    date_str = day.strftime(DATE_FORMAT)
+    kids = {}
+    for v in assignments.values():
+        kids[v.get("staff", "")] = kids.get(v.get("staff", ""), 0) + 1
+
+    last_headcount = {}
+    for v in logs.values():
+        if v.get("action") == "Accurate Headcount" and date_str in v.get("timestamp", ""):
+            when = parse_timestamp(v["timestamp"])
+            if when and when > last_headcount.get(v.get("staff", ""), datetime.datetime.min):
+                last_headcount[v.get("staff", "")] = when
+
+    staff_rows = [{
+        "staff": v["name"],
+        "location": v.get("location", "Class 1"),
+        "kids": kids.get(v["name"], 0),
+        "last_headcount": last_headcount[v["name"]].strftime("%I:%M %p") if v["name"] in last_headcount else "",
+    } for v in sorted(staff.values(), key=lambda v: v["name"])]
+
+    incident_rows = sorted(
+        ({"timestamp": v.get("timestamp", ""), "staff": v.get("staff", ""), "child": v.get("child", ""), "note": v.get("note", "")}
+         for v in incidents.values() if date_str in v.get("timestamp", "")),
+        key=lambda r: parse_timestamp(r["timestamp"]) or datetime.datetime.min,
+        reverse=True,
+    )
+    return {"staff": staff_rows, "incidents": incident_rows, "total": len(assignments)}
@@ -0,0 +1,159 @@
+# child_ids.py
+# Stable child ids. Assignments, logs and incidents carry "child_id" next to
+# the display name, so a child's history survives a Rename and is looked up
+# by key instead of string-matching names across every log. The id is minted
+# when a child is first added and kept on the assignment through Move, Rename
+# and Role Swap; a child added again under the same name on a later day gets
+# their previous id back.
+#
+#   python child_ids.py   # backfill child_id on existing records
+import datetime
+import threading
+
+from formats import normalize, parse_timestamp
+from live_store import new_push_key
+
+PLACEHOLDER_CHILDREN = {"", "ALL", "[LOCATION UPDATE]"}
+RENAME_PREFIX = "Renamed to "
+
+
+def new_child_id():
+    return new_push_key()
+
+
+def renamed_to(log):
+    notes = log.get("notes", "")
+    return notes[len(RENAME_PREFIX):] if log.get("action") == "Rename" and notes.startswith(RENAME_PREFIX) else None
+
+
+class ChildHistory:
+    """child_id -> log and incident keys, oldest first, plus the latest id seen for each name."""
+
+    def __init__(self, logs=None, incidents=None):
+        self.logs = {}
+        self.incidents = {}
+        self.ids_by_name = {}
+        self._seen = {"logs": {}, "incidents": {}}  # node -> {key: record as last indexed}
+        self._newest = {"logs": "", "incidents": ""}  # node -> newest key indexed
+        self._lock = threading.Lock()
+        self.sync(logs or {}, incidents or {})
+
+    def sync(self, logs, incidents):
+        """Index records added since the last sync.
+
+        Push keys sort in creation order, so new records are appended. A
+        node with a deleted or edited record, or a new key older than ones
+        already indexed, is reindexed from scratch.
+        """
+        with self._lock:
+            self._sync_node("logs", logs, self.logs)
+            self._sync_node("incidents", incidents, self.incidents)
+        return self
+
+    def _sync_node(self, name, records, index):
+        seen = self._seen[name]
+        added = []
+        rebuild = False
+        for key, v in records.items():
+            old = seen.get(key)
+            if old is v:  # live store records are replaced, not mutated, when they change
+                continue
+            if old is not None:
+                if old != v:
+                    rebuild = True
+                    break
+                seen[key] = v
+                continue
+            added.append(key)
+        added.sort()
+        if rebuild or len(seen) + len(added) != len(records) or (added and added[0] < self._newest[name]):
+            index.clear()
+            seen.clear()
+            if name == "logs":
+                self.ids_by_name.clear()
+            added = sorted(records)
+            self._newest[name] = ""
+        if added:
+            self._newest[name] = added[-1]
+        for key in added:
+            v = seen[key] = records[key]
+            child_id = v.get("child_id")
+            if child_id:
+                index.setdefault(child_id, []).append(key)
+                if name == "logs":
+                    self.ids_by_name[normalize(renamed_to(v) or v.get("child", ""))] = child_id
+
+    def id_for(self, name, assignments=None):
+        """The id a newly added child called ``name`` should get.
+
+        Reuses the id last seen for that name unless it is already on an
+        active assignment (a second child with the same name).
+        """
+        child_id = self.ids_by_name.get(normalize(name))
+        active = {v.get("child_id") for v in (assignments or {}).values()}
+        return child_id if child_id and child_id not in active else new_child_id()
+
+    def log_entries(self, child_id, logs, actions=None):
+        with self._lock:
+            keys = list(self.logs.get(child_id, []))
+        entries = (logs[k] for k in keys if k in logs)
+        return [v for v in entries if actions is None or v.get("action") in actions]
+
+    def incident_entries(self, child_id, incidents):
+        with self._lock:
+            keys = list(self.incidents.get(child_id, []))
+        return [incidents[k] for k in keys if k in incidents]
+
+
+def _when(timestamp):
+    return parse_timestamp(timestamp) or datetime.datetime.min
+
+
+def backfill_paths(assignments, logs, incidents):
+    """Multi-path update body adding child_id wherever it is missing.
+
+    Replays logs and incidents in time order, following the name each child
+    had at the time: Rename carries the id over to the new name, and any
+    other name seen for the first time gets a new id. Placeholder rows
+    ("ALL", "[LOCATION UPDATE]") are left alone.
+    """
+    events = [(_when(v.get("timestamp")), key, "logs", v) for key, v in logs.items()]
+    events += [(_when(v.get("timestamp")), key, "incidents", v) for key, v in incidents.items()]
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    current = {}  # normalized name -> id
+    paths = {}
+    for _, key, node, v in events:
+        name = v.get("child", "")
+        if name in PLACEHOLDER_CHILDREN:
+            continue
+        child_id = v.get("child_id") or current.get(normalize(name)) or new_child_id()
+        current[normalize(name)] = child_id
+        if renamed_to(v):
+            current[normalize(renamed_to(v))] = child_id
+        if not v.get("child_id"):
+            paths[f"{node}/{key}/child_id"] = child_id
+
+    active = set()
+    for key, v in assignments.items():
+        child_id = v.get("child_id")
+        if not child_id:
+            child_id = current.get(normalize(v.get("child", "")))
+            if not child_id or child_id in active:
+                child_id = new_child_id()
+            paths[f"assignments/{key}/child_id"] = child_id
+        active.add(child_id)
+    return paths
+
+
+if __name__ == "__main__":
+    from database import reference
+    from live_store import fetch_all
+
+    root = reference("/")
+    nodes = fetch_all({name: reference(name) for name in ["assignments", "logs", "incidents"]})
+    paths = backfill_paths(nodes["assignments"], nodes["logs"], nodes["incidents"])
+    items = list(paths.items())
+    for i in range(0, len(items), 500):
+        root.update(dict(items[i:i + 500]))
+    print(f"✅ child_id backfilled on {len(paths)} records")
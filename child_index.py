@@ -0,0 +1,89 @@
+# child_index.py
+# Prefix index over the names of every checked-in child, for the Staff View
+# search box and the near-duplicate warning on Add Child. Each word of a
+# normalized name goes into a trie whose nodes hold the assignment ids below
+# them, so a prefix lookup is one walk down the trie. The index is kept in
+# step with the assignments by sync(), which only touches changed entries.
+import difflib
+import threading
+
+from formats import normalize
+
+SIMILAR_CUTOFF = 0.8
+
+
+class ChildIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = {}  # assignment id -> (child, staff)
+        self.root = {"ids": set(), "next": {}}
+
+    # --- UPDATES ---
+    def _walk(self, word, create=False):
+        node = self.root
+        for ch in word:
+            if ch not in node["next"]:
+                if not create:
+                    return None
+                node["next"][ch] = {"ids": set(), "next": {}}
+            node = node["next"][ch]
+            yield node
+
+    def _add(self, key, child, staff):
+        self.entries[key] = (child, staff)
+        for word in set(normalize(child).split()):
+            for node in self._walk(word, create=True):
+                node["ids"].add(key)
+
+    def _remove(self, key):
+        child, _ = self.entries.pop(key)
+        for word in set(normalize(child).split()):
+            path = [self.root] + list(self._walk(word))
+            for node in path[1:]:
+                node["ids"].discard(key)
+            # Prune branches left empty, deepest first.
+            for parent, ch in reversed(list(zip(path, word))):
+                child_node = parent["next"].get(ch)
+                if child_node and not child_node["ids"]:
+                    del parent["next"][ch]
+
+    def sync(self, assignments):
+        with self._lock:
+            for key in [k for k in self.entries if k not in assignments]:
+                self._remove(key)
+            for key, v in assignments.items():
+                current = (v.get("child", ""), v.get("staff", ""))
+                if self.entries.get(key) != current:
+                    if key in self.entries:
+                        self._remove(key)
+                    self._add(key, *current)
+        return self
+
+    # --- QUERIES ---
+    def search(self, query, limit=10):
+        """(assignment id, child, staff) for names with a word starting with every query word.
+
+        Entries are copied under the lock, since another session's sync() may
+        drop an id right after.
+        """
+        words = normalize(query).split()
+        if not words:
+            return []
+        with self._lock:
+            matches = None
+            for word in words:
+                nodes = list(self._walk(word))
+                ids = nodes[-1]["ids"] if len(nodes) == len(word) else set()
+                matches = set(ids) if matches is None else matches & ids
+            return sorted(((k,) + self.entries[k] for k in matches), key=lambda e: e[1])[:limit]
+
+    def near_duplicates(self, name):
+        """Checked-in children whose name is the same as or close to ``name``, as (child, staff)."""
+        target = normalize(name)
+        if not target:
+            return []
+        # Narrow to names sharing the first letter of the first word before comparing.
+        candidates = self.search(target[0], limit=None)
+        similar = [(child, staff) for _, child, staff in candidates
+                   if difflib.SequenceMatcher(None, target, normalize(child)).ratio() >= SIMILAR_CUTOFF]
+        return sorted(similar)
@@ -0,0 +1,71 @@
+# daily_summary.py
+# End-of-day rollup of the logs and incidents into daily_summary/<YYYY-MM-DD>,
+# so the Admin View can show a past day with one small read instead of
+# rescanning every log. Run from the Admin View button or as a CLI:
+#
+#   python daily_summary.py             # today
+#   python daily_summary.py 2025-07-14  # a specific day
+import datetime
+import sys
+from collections import Counter
+
+from formats import DATE_FORMAT, parse_timestamp
+
+
+def _hour(timestamp):
+    parsed = parse_timestamp(timestamp)
+    return parsed.strftime("%H:00") if parsed else ""
+
+
+def build_daily_summary(logs, incidents, day, generated):
+    """Summarize one day of logs and incidents.
+
+    Everything is stored as lists of rows rather than dicts keyed by staff
+    name, since names may contain characters Firebase does not allow in keys.
+    """
+    date_str = day.strftime(DATE_FORMAT)
+    day_logs = [v for v in logs.values() if date_str in v.get("timestamp", "")]
+
+    counts = Counter((v.get("staff", ""), _hour(v.get("timestamp", "")), v.get("action", "")) for v in day_logs)
+    action_counts = [{"staff": s, "hour": h, "action": a, "count": n} for (s, h, a), n in sorted(counts.items())]
+
+    def rows(action):
+        return sorted(
+            ({"timestamp": v.get("timestamp", ""), "staff": v.get("staff", ""), "child": v.get("child", ""), "notes": v.get("notes", "")}
+             for v in day_logs if v.get("action") == action),
+            key=lambda r: parse_timestamp(r["timestamp"]) or datetime.datetime.min,
+        )
+
+    headcounts = Counter((v.get("timestamp", ""), v.get("staff", "")) for v in day_logs if v.get("action") == "Accurate Headcount")
+    day_incidents = [
+        {"timestamp": v.get("timestamp", ""), "staff": v.get("staff", ""), "child": v.get("child", ""), "note": v.get("note", "")}
+        for v in incidents.values() if date_str in v.get("timestamp", "")
+    ]
+
+    return {
+        "date": day.isoformat(),
+        "generated": generated,
+        "log_count": len(day_logs),
+        "action_counts": action_counts,
+        "headcounts": [{"timestamp": t, "staff": s, "children": n}
+                       for (t, s), n in sorted(headcounts.items(), key=lambda h: (parse_timestamp(h[0][0]) or datetime.datetime.min, h[0][1]))],
+        "moves": rows("Move") + rows("Role Swap"),  # bulk shift-change moves listed after single moves
+        "checkouts": rows("Checkout"),
+        "incidents": day_incidents,
+    }
+
+
+def write_daily_summary(root_ref, logs, incidents, day, generated):
+    summary = build_daily_summary(logs, incidents, day, generated)
+    root_ref.child(f"daily_summary/{day.isoformat()}").set(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    from database import MT, now_timestamp, reference
+    from live_store import fetch_all
+
+    day = datetime.date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else datetime.datetime.now(MT).date()
+    nodes = fetch_all({"logs": reference("logs"), "incidents": reference("incidents")})
+    summary = write_daily_summary(reference("/"), nodes["logs"], nodes["incidents"], day, now_timestamp())
+    print(f"✅ daily_summary/{day.isoformat()}: {summary['log_count']} logs, {len(summary['incidents'])} incidents")
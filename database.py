@@ -0,0 +1,59 @@
+# database.py
+# Shared setup for main.py and the command-line jobs (daily_summary.py, ...).
+import datetime
+
+import streamlit as st
+import firebase_admin
+from firebase_admin import credentials, db
+from pytz import timezone
+
+from formats import format_timestamp
+
+# --- CONFIG ---
+MT = timezone("US/Mountain")
+
+def now_timestamp():
+    return format_timestamp(datetime.datetime.now(MT))
+
+def today_date():
+    return datetime.datetime.now(MT).date().isoformat()
+
+# --- DATABASE INITIALIZATION ---
+# [database] backend = "local" in secrets runs against the in-process stand-in
+# (local_db.py) instead of Firebase, e.g. for soak.py and offline development;
+# backend = "sqlite" stores everything in a local SQLite file (sql_db.py).
+BACKEND = st.secrets.get("database", {}).get("backend", "firebase")
+# [database] cache = "host:port": read and write the app nodes through the
+# shared cache process (shared_cache.py) instead of each replica's own store.
+CACHE_ADDRESS = st.secrets.get("database", {}).get("cache")
+# [database] cache_token: shared secret between the cache process and replicas.
+CACHE_TOKEN = st.secrets.get("database", {}).get("cache_token", "")
+
+if BACKEND == "local":
+    import local_db
+    reference = local_db.reference
+elif BACKEND == "sqlite":
+    # Self-hosted: everything in one indexed SQLite file (sql_db.py).
+    import sql_db
+    sql_db.connect(st.secrets["database"].get("path", "childtracker.sqlite"))
+    reference = sql_db.reference
+else:
+    firebase_secret = st.secrets["firebase"]
+    cred = credentials.Certificate({
+        "type": firebase_secret["type"],
+        "project_id": firebase_secret["project_id"],
+        "private_key_id": firebase_secret["private_key_id"],
+        "private_key": firebase_secret["private_key"].replace('\\n', '\n'),
+        "client_email": firebase_secret["client_email"],
+        "client_id": firebase_secret["client_id"],
+        "auth_uri": firebase_secret["auth_uri"],
+        "token_uri": firebase_secret["token_uri"],
+        "auth_provider_x509_cert_url": firebase_secret["auth_provider_x509_cert_url"],
+        "client_x509_cert_url": firebase_secret["client_x509_cert_url"]
+    })
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(cred, {
+            'databaseURL': 'https://polksdc-default-rtdb.firebaseio.com'
+        })
+    reference = db.reference
@@ -0,0 +1,114 @@
+# export_range.py
+# Date-range exports of logs and incidents to CSV or XLSX. Push keys start
+# with their creation time, and a record is never pushed before its
+# timestamp, so the export reads the node a page at a time with
+# order_by_key() queries from the range's start to the end of the node,
+# keeping records whose timestamp is in the range. There is no upper key
+# bound: records pushed long after their timestamp (the Sheets history
+# imported by migration.py) are still found.
+#
+# Rows go straight to a temporary file, so the export itself holds one page
+# whatever the range. From the command line that is the whole story; in the
+# app, st.download_button keeps the finished file in memory, which is why
+# the Admin View caps the range (EXPORT_MAX_DAYS in main.py).
+#
+#   python export_range.py logs 2025-06-01 2025-08-31 summer_logs.csv
+#   python export_range.py incidents 2025-06-01 2025-08-31 incidents.xlsx
+import argparse
+import csv
+import datetime
+import os
+import shutil
+import tempfile
+
+from formats import parse_timestamp
+from live_store import PUSH_CHARS
+
+PAGE_SIZE = 500
+KEY_MARGIN = datetime.timedelta(days=1)  # clock skew between the writer and the timestamp
+COLUMNS = {
+    "logs": ["timestamp", "action", "staff", "child", "child_id", "notes"],
+    "incidents": ["timestamp", "staff", "child", "child_id", "note"],
+}
+FORMATS = {  # format -> (file extension, MIME type)
+    "CSV": ("csv", "text/csv"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def key_at(when):
+    """The 8-character time prefix of a push key created at ``when`` (timezone-aware)."""
+    ms = int(when.timestamp() * 1000)
+    stamp = []
+    for _ in range(8):
+        stamp.append(PUSH_CHARS[ms % 64])
+        ms //= 64
+    return "".join(reversed(stamp))
+
+
+def records(ref, start, end, tz):
+    """Records of ``ref``'s node with start <= timestamp < end, in key order.
+
+    ``start`` and ``end`` are naive local times in ``tz`` (a pytz timezone,
+    like database.MT), as the stored timestamps are.
+    """
+    after = key_at(tz.localize(start - KEY_MARGIN))
+    while True:
+        # start_at is inclusive, so every page after the first repeats the previous last key.
+        page = ref.order_by_key().start_at(after).limit_to_first(PAGE_SIZE).get() or {}
+        keys = sorted(k for k in page if k != after)
+        for key in keys:
+            value = page[key]
+            when = parse_timestamp(value.get("timestamp")) if isinstance(value, dict) else None
+            if when and start <= when < end:
+                yield key, value
+        if len(page) < PAGE_SIZE or not keys:
+            return
+        after = keys[-1]
+
+
+def _rows(ref, node, start, end, tz):
+    for _, value in records(ref, start, end, tz):
+        yield [str(value.get(column, "")) for column in COLUMNS[node]]
+
+
+def export(ref, node, start, end, tz, fmt="CSV"):
+    """Write the export to a temporary file and return it open for reading."""
+    fd, path = tempfile.mkstemp(suffix="." + FORMATS[fmt][0])
+    try:
+        if fmt == "XLSX":
+            import openpyxl
+
+            os.close(fd)
+            book = openpyxl.Workbook(write_only=True)  # streams rows to disk instead of holding the sheet
+            sheet = book.create_sheet(node)
+            sheet.append(COLUMNS[node])
+            for row in _rows(ref, node, start, end, tz):
+                sheet.append(row)
+            book.save(path)
+        else:
+            with open(fd, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS[node])
+                writer.writerows(_rows(ref, node, start, end, tz))
+        return open(path, "rb")
+    finally:
+        os.remove(path)  # the returned handle keeps the data until it is closed
+
+
+if __name__ == "__main__":
+    from database import MT, reference
+
+    parser = argparse.ArgumentParser(description="Export logs or incidents for a date range to CSV or XLSX.")
+    parser.add_argument("node", choices=sorted(COLUMNS))
+    parser.add_argument("start", type=datetime.date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument("end", type=datetime.date.fromisoformat, help="last day, YYYY-MM-DD")
+    parser.add_argument("output", help="file to write; .xlsx for XLSX, anything else for CSV")
+    args = parser.parse_args()
+
+    fmt = "XLSX" if args.output.lower().endswith(".xlsx") else "CSV"
+    start = datetime.datetime.combine(args.start, datetime.time())
+    end = datetime.datetime.combine(args.end, datetime.time()) + datetime.timedelta(days=1)
+    with export(reference(args.node), args.node, start, end, MT, fmt) as src, open(args.output, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    print(f"✅ wrote {args.output}")
@@ -0,0 +1,25 @@
+# formats.py
+# How records spell times and child names, shared by the app, the storage
+# backends and the command-line jobs. No database or Streamlit imports, so
+# any module can use it.
+import datetime
+
+TIMESTAMP_FORMAT = "%B %d, %Y %I:%M %p"  # "July 14, 2025 09:05 AM", local (Mountain) time
+DATE_FORMAT = "%B %d, %Y"  # the date part of a timestamp, for "date_str in timestamp" filters
+
+
+def format_timestamp(when):
+    return when.strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(timestamp):
+    """The naive local datetime of a stored timestamp, or None if missing or malformed."""
+    try:
+        return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize(name):
+    """A child's name with case and spacing ignored, for matching."""
+    return " ".join(name.lower().split())
@@ -0,0 +1,163 @@
+# headcount_projection.py
+# Event-sourced view of who had which children when. The roster-changing log
+# actions are replayed in order into a child -> staff roster. Every
+# SNAPSHOT_EVERY events the roster is stored under roster_snapshots/, keyed so
+# that keys sort in event order; a point-in-time query reads only the nearest
+# earlier snapshot and replays the events after it. Each snapshot records how
+# many events it covers, and one whose count no longer matches the logs (a
+# backdated or removed entry before it) is skipped and later rebuilt.
+#
+#   python headcount_projection.py   # store snapshots for any new events
+import bisect
+
+from formats import DATE_FORMAT, parse_timestamp
+
+ROSTER_ACTIONS = {"Add", "Move", "Role Swap", "Checkout", "Rename", "EMERGENCY"}
+SNAPSHOT_EVERY = 250
+STALE_BATCH = 20  # snapshots read per step when walking back past stale ones
+_LAST = "\uffff"  # sorts after every push key
+
+
+def snapshot_key(when, log_key):
+    return f"{when:%Y%m%d%H%M}_{log_key}"
+
+
+def roster_events(logs):
+    """Roster-changing logs as (time, key, log) tuples, oldest first.
+
+    Timestamps only have minute resolution, so the push key (which is
+    time-ordered) breaks ties between entries logged in the same minute.
+    """
+    events = []
+    for key, v in logs.items():
+        if v.get("action") in ROSTER_ACTIONS:
+            when = parse_timestamp(v.get("timestamp"))
+            if when:
+                events.append((when, key, v))
+    events.sort(key=lambda e: (e[0], e[1]))
+    return events
+
+
+def apply_event(roster, log):
+    action = log.get("action")
+    child = log.get("child", "")
+    if action in ("Add", "Move", "Role Swap"):
+        roster[child] = log.get("staff", "")
+    elif action == "Checkout":
+        roster.pop(child, None)
+    elif action == "Rename":
+        notes = log.get("notes", "")
+        if notes.startswith("Renamed to "):
+            roster[notes[len("Renamed to "):]] = roster.pop(child, log.get("staff", ""))
+    elif action == "EMERGENCY":
+        roster.clear()
+
+
+def by_staff(roster):
+    grouped = {}
+    for child, staff in roster.items():
+        grouped.setdefault(staff, []).append(child)
+    return {staff: sorted(children) for staff, children in sorted(grouped.items())}
+
+
+class HeadcountProjection:
+    def __init__(self, logs, snapshots_ref):
+        self.events = roster_events(logs)
+        self.positions = [snapshot_key(when, key) for when, key, _ in self.events]
+        self.snapshots_ref = snapshots_ref
+
+    def _valid(self, snapshot_id, snapshot):
+        # A snapshot only holds while the events before it are the ones it was
+        # built from; a backdated (e.g. synced offline) or removed log changes
+        # their count.
+        return snapshot.get("events") == bisect.bisect_right(self.positions, snapshot_id)
+
+    def _latest_snapshot(self, upto=None):
+        """(id, snapshot, stale ids) for the latest valid snapshot at or before ``upto``.
+
+        Stale snapshots after it are skipped; id and snapshot are None when
+        there is no valid one.
+        """
+        stale, limit = [], 1
+        while True:
+            query = self.snapshots_ref.order_by_key()
+            if upto:
+                query = query.end_at(upto)
+            found = query.limit_to_last(limit).get() or {}
+            # end_at is inclusive, so later batches repeat the previous oldest key.
+            for snapshot_id in sorted((k for k in found if k not in stale), reverse=True):
+                if self._valid(snapshot_id, found[snapshot_id]):
+                    return snapshot_id, found[snapshot_id], stale
+                stale.append(snapshot_id)
+            if len(found) < limit or not stale:
+                return None, None, stale
+            upto, limit = stale[-1], STALE_BATCH
+
+    def _replay_from(self, snapshot_id, snapshot):
+        if snapshot:
+            return {child: staff for child, staff in snapshot.get("roster", [])}, snapshot["events"]
+        return {}, 0
+
+    def roster_at(self, when):
+        """child -> staff as of ``when``, replaying only since the nearest valid snapshot."""
+        upto = f"{when:%Y%m%d%H%M}_{_LAST}"
+        snapshot_id, snapshot, _ = self._latest_snapshot(upto)
+        roster, start = self._replay_from(snapshot_id, snapshot)
+        end = bisect.bisect_right(self.positions, upto)
+        for _, _, log in self.events[start:end]:
+            apply_event(roster, log)
+        return roster
+
+    def store_snapshots(self, every=SNAPSHOT_EVERY):
+        """Snapshot every ``every`` events since the latest valid snapshot, replacing stale ones."""
+        snapshot_id, snapshot, stale = self._latest_snapshot()
+        roster, start = self._replay_from(snapshot_id, snapshot)
+        changes = {key: None for key in stale}
+        created = 0
+        for i in range(start, len(self.events)):
+            apply_event(roster, self.events[i][2])
+            if (i - start + 1) % every == 0:
+                # "events" is how many events the roster covers, for _valid
+                changes[self.positions[i]] = {"children": len(roster), "events": i + 1, "roster": sorted(roster.items())}
+                created += 1
+        if changes:
+            self.snapshots_ref.update(changes)
+        return created
+
+    def reconcile_headcounts(self, logs, day):
+        """Compare each "Accurate Headcount" confirmation on ``day`` with the projection."""
+        date_str = day.strftime(DATE_FORMAT)
+        confirmations = {}
+        for v in logs.values():
+            if v.get("action") == "Accurate Headcount" and date_str in v.get("timestamp", ""):
+                confirmations.setdefault((v["timestamp"], v.get("staff", "")), set()).add(v.get("child", ""))
+        # Walk forward from the first confirmation instead of querying a
+        # snapshot for each one.
+        rows = []
+        roster, position = None, 0
+        for (timestamp, staff), confirmed in sorted(confirmations.items(), key=lambda c: (parse_timestamp(c[0][0]), c[0][1])):
+            when = parse_timestamp(timestamp)
+            end = bisect.bisect_right(self.positions, f"{when:%Y%m%d%H%M}_{_LAST}")
+            if roster is None:
+                roster = self.roster_at(when)
+            else:
+                for _, _, log in self.events[position:end]:
+                    apply_event(roster, log)
+            position = end
+            projected = set(by_staff(roster).get(staff, []))
+            rows.append({
+                "timestamp": timestamp,
+                "staff": staff,
+                "confirmed": len(confirmed),
+                "projected": len(projected),
+                "missing": ", ".join(sorted(projected - confirmed)),
+                "unexpected": ", ".join(sorted(confirmed - projected)),
+            })
+        return rows
+
+
+if __name__ == "__main__":
+    from database import reference
+
+    projection = HeadcountProjection(reference("logs").get() or {}, reference("roster_snapshots"))
+    print(f"✅ {projection.store_snapshots()} new roster snapshots over {len(projection.events)} roster events")
@@ -0,0 +1,252 @@
+# live_store.py
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- NODES MIRRORED IN MEMORY ---
+NODES = ["staff", "assignments", "logs", "incidents", "memos"]
+
+# --- ON-DISK SNAPSHOT (last-known state for cold starts) ---
+SNAPSHOT_PATH = os.path.join(".childtracker", "live_store.json.gz")
+SNAPSHOT_SECONDS = 30
+SYNC_TIMEOUT_SECONDS = 60  # cold start without a snapshot
+
+
+# --- PUSH KEYS (same scheme as the Firebase clients: time-ordered, 20 chars) ---
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_push_lock = threading.Lock()
+_last_push_ms = 0
+_last_rand = [0] * 12
+
+
+def new_push_key():
+    global _last_push_ms
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now == _last_push_ms:
+            i = 11
+            while i >= 0 and _last_rand[i] == 63:
+                _last_rand[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_rand[i] += 1
+        else:
+            _last_push_ms = now
+            for i in range(12):
+                _last_rand[i] = random.randrange(64)
+        stamp = []
+        for _ in range(8):
+            stamp.append(PUSH_CHARS[now % 64])
+            now //= 64
+        return "".join(reversed(stamp)) + "".join(PUSH_CHARS[r] for r in _last_rand)
+
+
+def _split(path):
+    return [p for p in path.split("/") if p]
+
+
+def _set_path(tree, parts, value):
+    """Return a copy of tree with the value at parts replaced (deleted when None).
+
+    Only the dicts along the path are copied, so readers iterating the old
+    tree in another session are never mutated underneath.
+    """
+    if not parts:
+        return value if isinstance(value, dict) else {}
+    tree = dict(tree) if isinstance(tree, dict) else {}
+    head, rest = parts[0], parts[1:]
+    if rest:
+        child = _set_path(tree.get(head), rest, value)
+        if child or value is not None:
+            tree[head] = child
+        else:
+            tree.pop(head, None)
+    elif value is None:
+        tree.pop(head, None)
+    else:
+        tree[head] = value
+    return tree
+
+
+def fetch_all(refs):
+    """Get several nodes concurrently: one round trip's wait instead of one per node."""
+    with ThreadPoolExecutor(max_workers=max(len(refs), 1)) as pool:
+        results = {name: pool.submit(ref.get) for name, ref in refs.items()}
+        return {name: future.result() or {} for name, future in results.items()}
+
+
+class LiveStore:
+    """In-memory mirror of the Firebase nodes, kept current by listener events.
+
+    One instance is shared by every session in the process (see
+    ``get_live_store`` in main.py), so a page render reads from memory instead
+    of downloading each node again. Every change bumps the node's version so
+    data derived from a node can be cached until the node changes.
+
+    Each listener's first event is its whole node, so that is the initial
+    load. With a ``snapshot_path``, the nodes are saved there (at most every
+    SNAPSHOT_SECONDS) and a cold start serves the saved copy right away while
+    the listeners download every node in full in the background; otherwise
+    the constructor waits for the first events. The snapshot only shortens
+    the wait for the first page: it is not used to fetch less, and each
+    node's full download replaces it. ``synced`` is set once every node has
+    been downloaded.
+    """
+
+    def __init__(self, refs, root=None, snapshot_path=None):
+        self.refs = refs
+        self.root = root
+        self.snapshot_path = snapshot_path
+        self.snapshot_saved = None  # "saved" time of the snapshot served until synced
+        self.synced = threading.Event()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._data = {}
+        self._versions = {name: 0 for name in refs}
+        self._listeners = []
+        self._unsynced = set()
+        self.watchers = []  # callables(name), told after every change to a node
+
+        snapshot = self._load_snapshot() or {}
+        self._data = {name: snapshot.get("nodes", {}).get(name) or {} for name in refs}
+        self.snapshot_saved = snapshot.get("saved")
+        self._unsynced = set(refs)
+        if not self._unsynced:
+            self.synced.set()
+        if snapshot:
+            threading.Thread(target=self._listen, daemon=True).start()
+        else:
+            # Each listener's first event is its whole node, and the listeners
+            # download in parallel, so waiting for them is the initial load.
+            self._listen()
+            if not self.synced.wait(SYNC_TIMEOUT_SECONDS):
+                self.close()
+                raise TimeoutError(f"no initial data from {sorted(self._unsynced)} after {SYNC_TIMEOUT_SECONDS}s")
+        if snapshot_path:
+            threading.Thread(target=self._save_periodically, daemon=True).start()
+
+    def _listen(self):
+        for name, ref in self.refs.items():
+            self._listeners.append(ref.listen(lambda event, name=name: self._on_event(name, event)))
+
+    # --- SNAPSHOT ---
+    def _load_snapshot(self):
+        if not self.snapshot_path:
+            return None
+        try:
+            with gzip.open(self.snapshot_path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, EOFError, ValueError):
+            return None
+
+    def save_snapshot(self):
+        # Nodes are replaced, never mutated, so holding the lock while taking
+        # the references is enough for a consistent copy.
+        with self._lock:
+            nodes = dict(self._data)
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"saved": time.time(), "nodes": nodes}, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def _save_periodically(self):
+        saved_versions = None
+        while not self._closed.wait(SNAPSHOT_SECONDS):
+            if self.synced.is_set() and self._versions != saved_versions:
+                saved_versions = dict(self._versions)
+                try:
+                    self.save_snapshot()
+                except OSError:
+                    pass
+
+    # --- LISTENER EVENTS ---
+    def _on_event(self, name, event):
+        if event.event_type == "put":
+            self._apply(name, _split(event.path), event.data)
+        elif event.event_type == "patch":
+            base = _split(event.path)
+            self._apply_many(name, [(base + _split(p), v) for p, v in (event.data or {}).items()])
+        if name in self._unsynced:
+            # A listener's first event is the whole node as it is now (a full
+            # download, not a delta), which replaces the copy loaded from the
+            # snapshot.
+            self._unsynced.discard(name)
+            if not self._unsynced:
+                self.synced.set()
+
+    def _changed(self, name):
+        for watcher in list(self.watchers):
+            watcher(name)
+
+    def _apply(self, name, parts, value):
+        with self._lock:
+            self._data[name] = _set_path(self._data[name], parts, value)
+            self._versions[name] += 1
+        self._changed(name)
+
+    def _apply_many(self, name, changes):
+        # Copy the node once for the whole batch rather than once per change.
+        with self._lock:
+            tree = dict(self._data[name])
+            for parts, value in changes:
+                if len(parts) == 1 and value is not None:
+                    tree[parts[0]] = value
+                elif len(parts) == 1:
+                    tree.pop(parts[0], None)
+                else:
+                    tree = _set_path(tree, parts, value)
+            self._data[name] = tree
+            self._versions[name] += 1
+        self._changed(name)
+
+    # --- READS ---
+    def get(self, name):
+        return self._data.get(name) or {}
+
+    def version(self, name):
+        return self._versions.get(name, 0)
+
+    # --- WRITES (applied locally right away, the listener echo is a no-op) ---
+    def push(self, name, value):
+        key = self.refs[name].push(value).key
+        self._apply(name, [key], value)
+        return key
+
+    def update(self, name, key, value):
+        self.refs[name].child(key).update(value)
+        with self._lock:
+            current = dict(self._data[name].get(key) or {})
+            current.update(value)
+            self._data[name] = _set_path(self._data[name], [key], current)
+            self._versions[name] += 1
+        self._changed(name)
+
+    def update_many(self, paths):
+        """One multi-path write at the database root.
+
+        ``paths`` maps "node/key" to a value, e.g. an assignment and its log
+        entry, so a batch lands in a single request and all-or-nothing.
+        """
+        self.root.update(paths)
+        grouped = {}
+        for path, value in paths.items():
+            name, *parts = _split(path)
+            if name in self._data:
+                grouped.setdefault(name, []).append((parts, value))
+        for name, changes in grouped.items():
+            self._apply_many(name, changes)
+
+    def delete(self, name, key):
+        self.refs[name].child(key).delete()
+        self._apply(name, [key], None)
+
+    def close(self):
+        self._closed.set()
+        for registration in self._listeners:
+            registration.close()
+        self._listeners = []
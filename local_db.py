@@ -0,0 +1,211 @@
+# local_db.py
+# In-process stand-in for the Firebase Realtime Database.
+# Implements the slice of firebase_admin.db.Reference that the app uses, so
+# main.py can run against it (secrets: [database] backend = "local") for
+# soak runs and offline development.
+import copy
+import threading
+from collections import Counter
+
+from live_store import new_push_key
+
+_lock = threading.RLock()
+_root = {}
+_listeners = []
+
+# Operation counters, read by soak.py to report database work per interaction.
+ops = Counter()
+
+
+def _split(path):
+    return [p for p in path.split("/") if p]
+
+
+def reset(data=None):
+    global _root
+    with _lock:
+        _root = copy.deepcopy(data) if data else {}
+        ops.clear()
+
+
+def reference(path="/", app=None, url=None):
+    return Reference(_split(path))
+
+
+class Event:
+    def __init__(self, event_type, path, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class ListenerRegistration:
+    def __init__(self, parts, callback):
+        self.parts = parts
+        self.callback = callback
+
+    def close(self):
+        with _lock:
+            if self in _listeners:
+                _listeners.remove(self)
+
+
+class Snapshot:
+    def __init__(self, key):
+        self.key = key
+
+
+def _read(parts):
+    node = _root
+    for part in parts:
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def _write(parts, value):
+    global _root
+    if not parts:
+        _root = value if isinstance(value, dict) else {}
+        return
+    node = _root
+    for part in parts[:-1]:
+        if not isinstance(node.get(part), dict):
+            if value is None:
+                return
+            node[part] = {}
+        node = node[part]
+    if value is None:
+        node.pop(parts[-1], None)
+    else:
+        node[parts[-1]] = value
+
+
+def _notify(parts, value):
+    # Deliver a "put" to every listener at or above the written path, the way
+    # the RTDB streaming API reports it relative to the listened location.
+    with _lock:
+        targets = [r for r in _listeners if parts[:len(r.parts)] == r.parts]
+    for registration in targets:
+        relative = "/" + "/".join(parts[len(registration.parts):])
+        registration.callback(Event("put", relative, copy.deepcopy(value)))
+
+
+class Reference:
+    def __init__(self, parts):
+        self._parts = parts
+
+    @property
+    def key(self):
+        return self._parts[-1] if self._parts else None
+
+    @property
+    def path(self):
+        return "/" + "/".join(self._parts)
+
+    def child(self, path):
+        return Reference(self._parts + _split(path))
+
+    def get(self):
+        with _lock:
+            ops["get"] += 1
+            return copy.deepcopy(_read(self._parts))
+
+    def set(self, value):
+        with _lock:
+            ops["set"] += 1
+            _write(self._parts, copy.deepcopy(value))
+        _notify(self._parts, value)
+
+    def push(self, value=""):
+        key = new_push_key()
+        with _lock:
+            ops["push"] += 1
+            _write(self._parts + [key], copy.deepcopy(value))
+        _notify(self._parts + [key], value)
+        return Snapshot(key)
+
+    def update(self, value):
+        changes = [(self._parts + _split(k), v) for k, v in value.items()]
+        with _lock:
+            ops["update"] += 1
+            for parts, v in changes:
+                _write(parts, copy.deepcopy(v))
+            listeners = list(_listeners)
+        # Like the RTDB stream, a multi-path update reaches each listener as a
+        # single "patch" of everything that changed under it.
+        for registration in listeners:
+            n = len(registration.parts)
+            patch = {"/".join(parts[n:]): v for parts, v in changes if parts[:n] == registration.parts and len(parts) > n}
+            if patch:
+                registration.callback(Event("patch", "/", copy.deepcopy(patch)))
+
+    def delete(self):
+        with _lock:
+            ops["delete"] += 1
+            _write(self._parts, None)
+        _notify(self._parts, None)
+
+    def order_by_key(self):
+        return Query(self, None)
+
+    def order_by_child(self, path):
+        return Query(self, path)
+
+    def listen(self, callback):
+        registration = ListenerRegistration(self._parts, callback)
+        with _lock:
+            ops["listen"] += 1
+            _listeners.append(registration)
+            initial = copy.deepcopy(_read(self._parts))
+        callback(Event("put", "/", initial))
+        return registration
+
+
+class Query:
+    def __init__(self, ref, order_by):
+        self._ref = ref
+        self._order_by = order_by
+        self._start = self._end = None
+        self._first = self._last = None
+
+    def _sort_value(self, item):
+        key, value = item
+        if self._order_by is None:
+            return key
+        for part in _split(self._order_by):
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+    def start_at(self, start):
+        self._start = start
+        return self
+
+    def end_at(self, end):
+        self._end = end
+        return self
+
+    def limit_to_first(self, limit):
+        self._first = limit
+        return self
+
+    def limit_to_last(self, limit):
+        self._last = limit
+        return self
+
+    def get(self):
+        with _lock:
+            ops["query"] += 1
+            data = copy.deepcopy(_read(self._ref._parts)) or {}
+        items = [i for i in data.items() if self._sort_value(i) is not None]
+        items.sort(key=lambda i: (self._sort_value(i), i[0]))
+        if self._start is not None:
+            items = [i for i in items if self._sort_value(i) >= self._start]
+        if self._end is not None:
+            items = [i for i in items if self._sort_value(i) <= self._end]
+        if self._first is not None:
+            items = items[:self._first]
+        if self._last is not None:
+            items = items[-self._last:]
+        return dict(items)
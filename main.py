@@ -1,74 +1,165 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, db
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import datetime
-from pytz import timezone
+from database import BACKEND, CACHE_ADDRESS, CACHE_TOKEN, MT, now_timestamp, today_date, reference
+from formats import DATE_FORMAT, TIMESTAMP_FORMAT
+from live_store import SNAPSHOT_PATH
+from repository import FirebaseRepository
+from sql_db import SqlRepository
+from shared_cache import CachedRepository
+from roster_import import plan_import, import_paths
+from daily_summary import write_daily_summary
+from headcount_projection import HeadcountProjection, by_staff
+from note_search import NoteIndex
+from transient_state import TransientFlags
+from center_dashboard import build_dashboard
+from offline_replica import OfflineReplica
+from child_index import ChildIndex
+from export_range import FORMATS as EXPORT_FORMATS, export as export_records
+from shaping import (assignments_frame, staff_children, notes_by_name, note_rows, logs_on_date,
+                     newest_first, todays_memo, count_by_staff, log_counts)
 
 # --- CONFIG ---
-MT = timezone("US/Mountain")
-
-def now_timestamp():
-    return datetime.datetime.now(MT).strftime("%B %d, %Y %I:%M %p")
-
-def today_date():
-    return datetime.datetime.now(MT).date().isoformat()
-
-# --- FIREBASE INITIALIZATION ---
-firebase_secret = st.secrets["firebase"]
-cred = credentials.Certificate({
-    "type": firebase_secret["type"],
-    "project_id": firebase_secret["project_id"],
-    "private_key_id": firebase_secret["private_key_id"],
-    "private_key": firebase_secret["private_key"].replace('\\n', '\n'),
-    "client_email": firebase_secret["client_email"],
-    "client_id": firebase_secret["client_id"],
-    "auth_uri": firebase_secret["auth_uri"],
-    "token_uri": firebase_secret["token_uri"],
-    "auth_provider_x509_cert_url": firebase_secret["auth_provider_x509_cert_url"],
-    "client_x509_cert_url": firebase_secret["client_x509_cert_url"]
-})
-
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred, {
-        'databaseURL': 'https://polksdc-default-rtdb.firebaseio.com'
-    })
-
-# --- FIREBASE REFERENCES ---
-staff_ref = db.reference("staff")
-assignments_ref = db.reference("assignments")
-logs_ref = db.reference("logs")
-incidents_ref = db.reference("incidents")
-memos_ref = db.reference("memos")
-
-# --- HELPER ---
-def safe_get(ref):
-    return ref.get() or {}
+LIVE_REFRESH_SECONDS = 5
+BATHROOM_FLAG_MINUTES = 10
+DASHBOARD_REFRESH_SECONDS = 15
+OFFLINE_LOCATIONS = ["Field Trip", "Bus"]
+EXPORT_MAX_DAYS = 31  # st.download_button holds the whole file in memory; longer ranges use export_range.py
+
+# --- DATABASE REFERENCES ---
+staff_ref = reference("staff")
+assignments_ref = reference("assignments")
+logs_ref = reference("logs")
+incidents_ref = reference("incidents")
+memos_ref = reference("memos")
+daily_summary_ref = reference("daily_summary")
+roster_snapshots_ref = reference("roster_snapshots")
+root_ref = reference("/")
+
+# --- LIVE DATA (shared by all sessions, see repository.py) ---
+# Firebase: an in-memory mirror kept current by listeners. After a restart the
+# first page renders from the on-disk snapshot while the listeners download
+# every node again in the background. SQLite: indexed reads straight from the file. Behind a
+# load balancer, replicas share one cache process instead.
+@st.cache_resource
+def get_live_store():
+    if CACHE_ADDRESS:
+        return CachedRepository(CACHE_ADDRESS, CACHE_TOKEN)
+    if BACKEND == "sqlite":
+        return SqlRepository(["staff", "assignments", "logs", "incidents", "memos"])
+    return FirebaseRepository({
+        "staff": staff_ref,
+        "assignments": assignments_ref,
+        "logs": logs_ref,
+        "incidents": incidents_ref,
+        "memos": memos_ref,
+    }, root=root_ref, snapshot_path=None if BACKEND == "local" else SNAPSHOT_PATH)
+
+store = get_live_store()
+
+# Rebuilt only when the logs change; point-in-time queries start from the
+# nearest stored roster snapshot.
+@st.cache_resource(max_entries=1)
+def get_headcount_projection(logs_version):
+    return HeadcountProjection(store.get("logs"), roster_snapshots_ref)
+
+# Loaded from disk once per process, then only new or changed notes are
+# indexed (once per logs/incidents version, shared by every session). The
+# index saves itself in the background.
+@st.cache_resource
+def get_note_index():
+    return NoteIndex()
+
+@st.cache_resource(max_entries=1)
+def sync_note_index(logs_version, incidents_version):
+    index = get_note_index()
+    index.sync(store.get("logs"), store.get("incidents"))
+    return index
+
+# Name prefix index over checked-in children (Staff View search, Add Child
+# duplicate warning); only changed assignments are re-indexed.
+@st.cache_resource
+def get_child_index():
+    return ChildIndex()
+
+@st.cache_resource(max_entries=1)
+def sync_child_index(assignments_version):
+    return get_child_index().sync(store.get("assignments"))
+
+# Bathroom flags are seen by every session and clear themselves after
+# BATHROOM_FLAG_MINUTES. Behind a load balancer they live in the cache
+# process, so every replica sees them.
+@st.cache_resource
+def get_bathroom_flags():
+    if CACHE_ADDRESS:
+        return store.flags("bathroom", BATHROOM_FLAG_MINUTES * 60)
+    return TransientFlags(BATHROOM_FLAG_MINUTES * 60)
+
+bathroom_flags = get_bathroom_flags()
+
+# Offline-first replica for Field Trip / Bus runs, created the first time a
+# staff member switches to offline mode.
+@st.cache_resource
+def get_offline_replica():
+    return OfflineReplica(store, probe=lambda: staff_ref.order_by_key().limit_to_first(1).get(),
+                          read_assignment=lambda key: assignments_ref.child(key).get())
+
+# --- CENTER DASHBOARD (read-only front-desk display: main.py?view=dashboard) ---
+# Built once per change of the nodes it shows and shared by every screen, so
+# adding displays adds no database reads.
+@st.cache_resource(max_entries=1)
+def get_center_dashboard(staff_version, assignments_version, logs_version, incidents_version, day):
+    return build_dashboard(store.get("staff"), store.get("assignments"), store.get("logs"), store.get("incidents"), day)
+
+if st.query_params.get("view") == "dashboard":
+    st.title("🏕️ Center Dashboard")
+
+    @st.fragment(run_every=DASHBOARD_REFRESH_SECONDS)
+    def center_dashboard():
+        board = get_center_dashboard(
+            store.version("staff"), store.version("assignments"), store.version("logs"), store.version("incidents"),
+            datetime.datetime.now(MT).date()
+        )
+        col1, col2, col3 = st.columns(3)
+        col1.metric("🏕️ Total in Center", board["total"])
+        col2.metric("🧑‍🏫 Staff", len(board["staff"]))
+        col3.metric("🚨 Incidents Today", len(board["incidents"]))
+        st.dataframe(
+            pd.DataFrame(board["staff"], columns=["staff", "location", "kids", "last_headcount"]),
+            hide_index=True,
+            use_container_width=True,
+            height=38 + 35 * max(len(board["staff"]), 1)
+        )
+        st.subheader("🚨 Today's Incidents")
+        if board["incidents"]:
+            st.dataframe(pd.DataFrame(board["incidents"]), hide_index=True, use_container_width=True)
+        else:
+            st.success("✅ No incidents today.")
+        st.caption(f"Updated {datetime.datetime.now(MT).strftime('%I:%M:%S %p')}")
+
+    center_dashboard()
+    st.stop()
 
 # --- DEFAULT STAFF ---
 default_staff_list = []
-if not staff_ref.get():
+if not store.get("staff"):
     for name in default_staff_list:
-        staff_ref.push({"name": name, "location": "Class 1"})
+        store.push("staff", {"name": name, "location": "Class 1"})
 
 # --- HARD CODED LOCATIONS ---
 LOCATIONS = ["Big Playground", "School Playground", "Field", "Bathroom", "Class 1", "Class 2", "Class 3", "Pool", "Field Trip", "Bus"]
 
 # --- LOAD STAFF DATA ---
-staff_data_raw = safe_get(staff_ref)
+staff_data_raw = store.get("staff")
 staff_lookup = {v["name"]: v.get("location", "Class 1") for v in staff_data_raw.values()}
 STAFF = sorted(list(staff_lookup.keys()))
 
 # --- LOAD ASSIGNMENTS ---
-assignments_raw = safe_get(assignments_ref)
-rows = []
-for k, v in assignments_raw.items():
-    rows.append({
-        "id": k,
-        "staff": v.get("staff", ""),
-        "child": v.get("child", "")
-    })
-data = pd.DataFrame(rows, columns=["id", "staff", "child"])
+def load_assignments():
+    return assignments_frame(store.get("assignments"))
+
+data = load_assignments()
 
 # --- SIDEBAR STAFF MANAGEMENT ---
 st.sidebar.header("Manage Staff")
@@ -76,12 +167,187 @@ new_staff_name = st.sidebar.text_input("Add Staff Name:")
 new_staff_location = st.sidebar.selectbox("Default Location:", LOCATIONS)
 if st.sidebar.button("Add Staff Member"):
     if new_staff_name.strip():
-        staff_ref.push({"name": new_staff_name.strip(), "location": new_staff_location})
+        store.push("staff", {"name": new_staff_name.strip(), "location": new_staff_location})
         st.sidebar.success(f"Added {new_staff_name}")
         st.rerun()
 
+# --- CHILD PANEL ---
+QUICK_NOTES = ["Bathroom Break", "Snack Time", "Playing Well", "Needs Support", "Great Behavior"]
+
+NOTE_ROWS_VISIBLE = 5
+
+def render_notes(notes):
+    # One scrolling grid per list (rows are virtualized by the browser)
+    # instead of a markdown element per note.
+    st.dataframe(
+        pd.DataFrame(notes, columns=["timestamp", "type", "staff", "note"]),
+        hide_index=True,
+        use_container_width=True,
+        height=38 + 35 * min(len(notes), NOTE_ROWS_VISIBLE)
+    )
+
+def rerun_panel():
+    # A tap inside the panel is a fragment rerun; during a full script run
+    # (e.g. the panel's own first draw) fall back to rerunning the app.
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+@st.fragment
+def child_panel(child_id, owner, key_prefix=""):
+    # Runs on its own when one of its buttons is tapped, so an action only
+    # redraws this child. A fragment cannot redraw elements outside itself,
+    # so after a Move or Checkout the counts and lists are stale for up to
+    # LIVE_REFRESH_SECONDS (child_counts and roster_watcher below); a full
+    # rerun per tap would redraw every child panel instead.
+    assignment = store.get("assignments").get(child_id)
+    if not assignment:
+        st.caption("✅ Checked out.")
+        return
+    child_name = assignment.get("child", "")
+    stable_id = assignment.get("child_id", "")
+    staff = assignment.get("staff", "")
+    if staff != owner:
+        st.caption(f"🔄 **{child_name}** moved to {staff}.")
+        return
+    staff_list = sorted(v["name"] for v in store.get("staff").values())
+    location = next((v.get("location", "Class 1") for v in store.get("staff").values() if v["name"] == staff), "Class 1")
+
+    # Add bathroom flag indicator if present
+    bathroom_left = bathroom_flags.remaining(child_id)
+    bathroom_indicator = f"🚽 {int(bathroom_left // 60) + 1}m" if bathroom_left else ""
+    with st.expander(f"**{child_name}** {bathroom_indicator}"):
+        st.write(f"Assigned to: {staff} | Location: {location}")
+        # Bathroom flag toggle
+        if bathroom_left:
+            if st.button("🚽", key=f"bathroom_{key_prefix}{child_id}"):
+                bathroom_flags.clear(child_id)
+                rerun_panel()
+        else:
+            if st.button("🚽 ", key=f"bathroom_{key_prefix}{child_id}"):
+                bathroom_flags.set(child_id)
+                rerun_panel()
+
+        # Add tabs for different actions
+        tab1, tab2, tab3, tab4 = st.tabs(["🔄 Move", "📝 Notes", "⚠️ Incident", "✏️ Edit"])
+
+        with tab1:
+            current_index = staff_list.index(staff) if staff in staff_list else 0
+            new_staff_for_child = st.selectbox("Reassign:", staff_list, index=current_index, key=f"move_{key_prefix}{child_id}")
+            if st.button("Confirm Move", key=f"btn_move_{key_prefix}{child_id}"):
+                store.update("assignments", child_id, {"staff": new_staff_for_child, "child": child_name})
+                store.push("logs", {
+                    "timestamp": now_timestamp(),
+                    "action": "Move",
+                    "staff": new_staff_for_child,
+                    "child": child_name,
+                    "child_id": stable_id,
+                    "notes": f"Moved from {staff} to {new_staff_for_child}"
+                })
+                rerun_panel()
+
+            # One pending checkout per session, instead of a key per child ever shown
+            panel_key = f"{key_prefix}{child_id}"
+            if st.session_state.get("confirm_checkout") != panel_key:
+                if st.button("✅ Check Out", key=f"checkout_{key_prefix}{child_id}"):
+                    st.session_state.confirm_checkout = panel_key
+                    rerun_panel()
+            else:
+                st.warning("Confirm checkout?")
+                col_confirm, col_cancel = st.columns(2)
+                with col_confirm:
+                    if st.button("Confirm", key=f"confirm_button_{key_prefix}{child_id}"):
+                        store.delete("assignments", child_id)
+                        store.push("logs", {
+                            "timestamp": now_timestamp(),
+                            "action": "Checkout",
+                            "staff": staff,
+                            "child": child_name,
+                            "child_id": stable_id,
+                            "notes": "Checked Out"
+                        })
+                        bathroom_flags.clear(child_id)
+                        st.session_state.confirm_checkout = None
+                        rerun_panel()
+                with col_cancel:
+                    if st.button("Cancel", key=f"cancel_button_{key_prefix}{child_id}"):
+                        st.session_state.confirm_checkout = None
+                        rerun_panel()
+
+        with tab2:
+            # Quick note options
+            selected_quick_note = st.selectbox("Quick Notes:", [""] + QUICK_NOTES, key=f"quick_note_{key_prefix}{child_id}")
+
+            # Custom note input
+            custom_note = st.text_input("Custom Note:", key=f"note_{key_prefix}{child_id}")
+
+            # Save note button
+            if st.button("Save Note", key=f"save_note_{key_prefix}{child_id}"):
+                note_text = selected_quick_note or custom_note
+                if note_text:
+                    store.push("logs", {
+                        "timestamp": now_timestamp(),
+                        "action": "Note",
+                        "staff": staff,
+                        "child": child_name,
+                        "child_id": stable_id,
+                        "notes": note_text
+                    })
+                    st.success("Note saved!")
+
+            # View previous notes
+            st.write("Previous Notes:")
+            if stable_id:
+                child_logs = store.child_logs(stable_id, ["Note", "Incident"])[::-1]
+            else:
+                # Not backfilled yet (see child_ids.py): match by name
+                child_logs = notes_by_name(store.get("logs"), child_name)
+            notes = note_rows(child_logs)
+
+            if notes:
+                render_notes(notes)  # newest first, scroll for older ones
+            else:
+                st.info("No notes yet")
+
+        with tab3:
+            incident_note = st.text_input("Incident:", key=f"inc_{key_prefix}{child_id}")
+            if st.button("Save Incident", key=f"btn_inc_{key_prefix}{child_id}"):
+                store.push("incidents", {
+                    "timestamp": now_timestamp(),
+                    "staff": staff,
+                    "child": child_name,
+                    "child_id": stable_id,
+                    "note": incident_note
+                })
+                st.success("Incident logged!")
+
+            if stable_id:
+                past_incidents = store.child_incidents(stable_id)[::-1]
+                if past_incidents:
+                    st.write("Previous Incidents:")
+                    render_notes([{"timestamp": v.get("timestamp", ""), "type": "Incident Report", "staff": v.get("staff", ""), "note": v.get("note", "")} for v in past_incidents])
+
+        with tab4:
+            new_name = st.text_input("New Name:", value=child_name, key=f"rename_{key_prefix}{child_id}")
+            if st.button("Rename Child", key=f"btn_rename_{key_prefix}{child_id}"):
+                if new_name.strip() and new_name != child_name:
+                    store.update("assignments", child_id, {"child": new_name.strip()})
+                    store.push("logs", {
+                        "timestamp": now_timestamp(),
+                        "action": "Rename",
+                        "staff": staff,
+                        "child": child_name,
+                        "child_id": stable_id,
+                        "notes": f"Renamed to {new_name.strip()}"
+                    })
+                    rerun_panel()
+
 # --- PAGE NAVIGATION ---
-page = st.sidebar.radio("Navigate", ["Staff View", "Admin View", "Memo Management"])
+page = st.sidebar.radio("Navigate", ["Staff View", "Admin View", "Memo Management", "Search"])
+if not store.synced.is_set() and store.snapshot_saved:
+    saved = datetime.datetime.fromtimestamp(store.snapshot_saved, MT).strftime("%I:%M %p")
+    st.sidebar.caption(f"⏳ Showing data saved at {saved} while syncing with the database…")
 
 # ======================= STAFF VIEW =======================
 if page == "Staff View":
@@ -90,26 +356,92 @@ if page == "Staff View":
     if not staff:
         st.stop()
 
-    # Load all necessary data
-    staff_data = safe_get(staff_ref)
-    assignments_data = safe_get(assignments_ref)
-    logs_data = safe_get(logs_ref)
-    incidents_data = safe_get(incidents_ref)
+    # OFFLINE MODE (off unless switched on): roster, memo and notes from the
+    # local replica; changes are written straight through while the
+    # database answers, and queued until it does otherwise
+    offline_mode = st.toggle("📴 Offline mode", value=False,
+                             help="For field trips and bus runs: keep working without a connection")
+    if not offline_mode and staff_lookup.get(staff) in OFFLINE_LOCATIONS:
+        st.caption("Heading out? Turn on offline mode before you lose signal.")
+    if offline_mode:
+        replica = get_offline_replica()
+        replica.track(staff)
+
+        @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+        def offline_panel():
+            if replica.online is None:
+                status = "⚪ Checking connection"
+            elif replica.online:
+                synced = datetime.datetime.fromtimestamp(replica.last_sync, MT).strftime("%I:%M %p")
+                status = f"🟢 Online · synced {synced}"
+            else:
+                status = "🔴 Offline"
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.write(f"{status} · **{replica.backlog()}** change(s) waiting to sync")
+            with col2:
+                if st.button("🔄 Sync now"):
+                    replica.sync()
+                    rerun_panel()
+
+            st.markdown(f"**📋 Today's Memo:** {replica.memo(staff, today_date()) or '✅ No memo assigned today.'}")
+
+            roster = replica.roster(staff)
+            st.write(f"🧑‍🏫 Under {staff}: **{len(roster)}**")
+            if st.button("🧑‍🤝‍🧑 Confirm Headcount", disabled=not roster):
+                timestamp = now_timestamp()
+                for row in roster:
+                    replica.log({"timestamp": timestamp, "action": "Accurate Headcount", "staff": staff, "child": row["child"], "child_id": row["child_id"], "notes": "Headcount Confirmed"})
+                st.success("✅ Logged for all")
+
+            for row in roster:
+                with st.expander(f"**{row['child']}**"):
+                    new_staff_for_child = st.selectbox("Reassign:", STAFF, index=STAFF.index(staff) if staff in STAFF else 0, key=f"off_move_{row['id']}")
+                    col_move, col_out = st.columns(2)
+                    with col_move:
+                        if st.button("Confirm Move", key=f"off_btn_move_{row['id']}") and new_staff_for_child != staff:
+                            replica.move(row, staff, new_staff_for_child, now_timestamp())
+                            rerun_panel()
+                    with col_out:
+                        # Same one-pending-checkout confirm step as the online panel
+                        panel_key = f"off_{row['id']}"
+                        if st.session_state.get("confirm_checkout") != panel_key:
+                            if st.button("✅ Check Out", key=f"off_checkout_{row['id']}"):
+                                st.session_state.confirm_checkout = panel_key
+                                rerun_panel()
+                        else:
+                            st.warning("Confirm checkout?")
+                            if st.button("Confirm", key=f"off_confirm_{row['id']}"):
+                                replica.checkout(row, staff, now_timestamp())
+                                st.session_state.confirm_checkout = None
+                                rerun_panel()
+                            if st.button("Cancel", key=f"off_cancel_{row['id']}"):
+                                st.session_state.confirm_checkout = None
+                                rerun_panel()
+                    note_text = st.selectbox("Quick Notes:", [""] + QUICK_NOTES, key=f"off_quick_note_{row['id']}") or st.text_input("Custom Note:", key=f"off_note_{row['id']}")
+                    if st.button("Save Note", key=f"off_save_note_{row['id']}") and note_text:
+                        replica.log({"timestamp": now_timestamp(), "action": "Note", "staff": staff, "child": row["child"], "child_id": row["child_id"], "notes": note_text})
+                        rerun_panel()
+                    notes = replica.notes(row["child_id"])
+                    if notes:
+                        render_notes(notes)
+
+            conflicts = replica.conflicts()
+            if conflicts:
+                with st.expander(f"⚠️ Sync conflicts ({len(conflicts)})"):
+                    st.dataframe(pd.DataFrame(conflicts), hide_index=True, use_container_width=True)
+
+        offline_panel()
+        st.stop()
 
     # MEMOS IN SIDEBAR
-    with st.sidebar:
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def todays_memo_panel():
         st.subheader("📋 Today's Memo")
-        memos_data = safe_get(memos_ref)
-        today_iso = today_date()
-        todays_memo = ""
-        for v in memos_data.values():
-            if v.get("staff") == staff and v.get("date") == today_iso:
-                todays_memo = v.get("memo", "")
-                break
-        st.markdown(todays_memo or "✅ No memo assigned today.")
+        st.markdown(todays_memo(store.get("memos"), staff, today_date()) or "✅ No memo assigned today.")
 
-    staff_assignments = data[data["staff"] == staff]
-    rows_with_index = staff_assignments.to_dict(orient="records")
+    with st.sidebar:
+        todays_memo_panel()
 
     st.info("""- **KEEP LOCATION UPDATED 🎯**\n- 🧑‍🤝‍🧑 Count heads\n- ☀️ Sunscreen\n- 💧 Hydrate\n- ✅ Use Action Buttons\n- 📢 Walkie + App = safest""")
 
@@ -123,8 +455,9 @@ if page == "Staff View":
         selected_action = st.selectbox("Select Action", list(action_dict.keys()), key="act")
         if st.button("Confirm Action"):
             timestamp = now_timestamp()
-            for row in rows_with_index:
-                logs_ref.push({"timestamp": timestamp, "action": selected_action, "staff": staff, "child": row["child"], "notes": action_dict[selected_action]})
+            data = load_assignments()
+            for row in staff_children(data, staff).to_dict(orient="records"):
+                store.push("logs", {"timestamp": timestamp, "action": selected_action, "staff": staff, "child": row["child"], "child_id": row["child_id"], "notes": action_dict[selected_action]})
             st.success("✅ Logged for all")
             st.rerun()
 
@@ -134,322 +467,80 @@ if page == "Staff View":
     if staff_location != new_location:
         for key, value in staff_data_raw.items():
             if value["name"] == staff:
-                staff_ref.child(key).update({"location": new_location})
-                logs_ref.push({"timestamp": now_timestamp(), "action": "Location Update", "staff": staff, "child": "[LOCATION UPDATE]", "notes": f"Updated location to {new_location}"})
+                store.update("staff", key, {"location": new_location})
+                store.push("logs", {"timestamp": now_timestamp(), "action": "Location Update", "staff": staff, "child": "[LOCATION UPDATE]", "notes": f"Updated location to {new_location}"})
                 break
         st.rerun()
         
     # st.subheader("Children", divider="gray")
 
     st.divider()
-    # Initialize bathroom flags if not exists
-    if "bathroom_flags" not in st.session_state:
-        st.session_state.bathroom_flags = set()
+
+    # Find any child in the center without opening every staff list
+    child_query = st.text_input("🔍 Find a child:", key="child_search", placeholder="First name or initials")
+    if child_query.strip():
+        found = sync_child_index(store.version("assignments")).search(child_query)
+        if not found:
+            st.caption("No checked-in child matches.")
+        for assignment_id, found_child, found_staff in found:
+            st.write(f"**{found_child}** is with **{found_staff}** — {staff_lookup.get(found_staff, 'Class 1')}")
+            child_panel(assignment_id, found_staff, key_prefix="search_")
 
     st.write(f" ##### ➕ Add Child to {staff}")
     new_child = st.text_input("Child name (First + Last Initial):", key="new_child_global")
+    if new_child.strip():
+        similar = sync_child_index(store.version("assignments")).near_duplicates(new_child)
+        if similar:
+            st.warning("⚠️ Similar name already checked in: " + ", ".join(f"{c} (with {s})" for c, s in similar))
     if st.button("Add Child ✅"):
         if new_child.strip():
-            assignments_ref.push({"staff": staff, "child": new_child.strip()})
-            logs_ref.push({"timestamp": now_timestamp(), "action": "Add", "staff": staff, "child": new_child.strip(), "notes": "Added"})
+            history = store.child_history()
+            new_child_id = history.id_for(new_child.strip(), store.get("assignments"))
+            store.push("assignments", {"staff": staff, "child": new_child.strip(), "child_id": new_child_id})
+            store.push("logs", {"timestamp": now_timestamp(), "action": "Add", "staff": staff, "child": new_child.strip(), "child_id": new_child_id, "notes": "Added"})
             st.rerun()
 
-    # Active staff's children
-    for i, row in enumerate(rows_with_index):
-        child_name = row["child"]
-        child_id = row["id"]
-        
-        # Add bathroom flag indicator if present
-        bathroom_indicator = "🚽" if child_id in st.session_state.bathroom_flags else ""
-        with st.expander(f"**{child_name}** {bathroom_indicator}"):
-            st.write(f"Assigned to: {staff} | Location: {new_location}")
- # Bathroom flag toggle
-            if child_id in st.session_state.bathroom_flags:
-                if st.button("🚽", key=f"bathroom_{child_id}"):
-                    st.session_state.bathroom_flags.remove(child_id)
-                    st.rerun()
-            else:
-                if st.button("🚽 ", key=f"bathroom_{child_id}"):
-                    st.session_state.bathroom_flags.add(child_id)
-                    st.rerun()
-            
-            # Add tabs for different actions
-            tab1, tab2, tab3, tab4 = st.tabs(["🔄 Move", "📝 Notes", "⚠️ Incident", "✏️ Edit"])
-            
-            with tab1:
-                valid_staff_list = STAFF
-                current_index = valid_staff_list.index(staff) if staff in valid_staff_list else 0
-                new_staff_for_child = st.selectbox("Reassign:", valid_staff_list, index=current_index, key=f"move_{child_id}")
-                if st.button("Confirm Move", key=f"btn_move_{child_id}"):
-                    assignments_ref.child(child_id).update({"staff": new_staff_for_child, "child": child_name})
-                    logs_ref.push({
-                        "timestamp": now_timestamp(),
-                        "action": "Move",
-                        "staff": new_staff_for_child,
-                        "child": child_name,
-                        "notes": f"Moved from {staff} to {new_staff_for_child}"
-                    })
-                    st.success("Child reassigned!")
-                    st.rerun()
+    # The lists below are redrawn only when the roster, staff locations or
+    # bathroom flags change (flags also once a minute while any is set, for
+    # the countdown): this watcher compares versions every
+    # LIVE_REFRESH_SECONDS and draws nothing otherwise.
+    def roster_versions():
+        return (store.version("assignments"), store.version("staff"), bathroom_flags.version())
 
-                
-               
+    st.session_state.roster_drawn = roster_versions()
 
-                if f"confirm_checkout_{child_id}" not in st.session_state:
-                    st.session_state[f"confirm_checkout_{child_id}"] = False
-                if not st.session_state[f"confirm_checkout_{child_id}"]:
-                    if st.button("✅ Check Out", key=f"checkout_{child_id}"):
-                        st.session_state[f"confirm_checkout_{child_id}"] = True
-                else:
-                    st.warning("Confirm checkout?")
-                    col_confirm, col_cancel = st.columns(2)
-                    with col_confirm:
-                        if st.button("Confirm", key=f"confirm_button_{child_id}"):
-                            assignments_ref.child(child_id).delete()
-                            logs_ref.push({
-                                "timestamp": now_timestamp(),
-                                "action": "Checkout",
-                                "staff": staff,
-                                "child": child_name,
-                                "notes": "Checked Out"
-                            })
-                            del st.session_state[f"confirm_checkout_{child_id}"]
-                            st.success("Checked out.")
-                            st.rerun()
-                    with col_cancel:
-                        if st.button("Cancel", key=f"cancel_button_{child_id}"):
-                            st.session_state[f"confirm_checkout_{child_id}"] = False
-            
-            with tab2:
-                # Quick note options
-                quick_notes = ["Bathroom Break", "Snack Time", "Playing Well", "Needs Support", "Great Behavior"]
-                selected_quick_note = st.selectbox("Quick Notes:", [""] + quick_notes, key=f"quick_note_{child_id}")
-                
-                # Custom note input
-                custom_note = st.text_input("Custom Note:", key=f"note_{child_id}")
-                
-                # Save note button
-                if st.button("Save Note", key=f"save_note_{child_id}"):
-                    note_text = selected_quick_note or custom_note
-                    if note_text:
-                        logs_ref.push({
-                            "timestamp": now_timestamp(),
-                            "action": "Note",
-                            "staff": staff,
-                            "child": child_name,
-                            "notes": note_text
-                        })
-                        st.success("Note saved!")
-                        st.rerun()
-                
-                # View previous notes
-                st.write("Previous Notes:")
-                notes = []
-                for k, v in logs_data.items():
-                    if v.get("child") == child_name and v.get("action") in ["Note", "Incident"]:
-                        notes.append({
-                            "timestamp": v.get("timestamp", ""),
-                            "type": v.get("action", ""),
-                            "staff": v.get("staff", ""),
-                            "note": v.get("notes", "")
-                        })
-                
-                if notes:
-                    notes.sort(key=lambda x: x["timestamp"], reverse=True)
-                    for note in notes[:5]:  # Show last 5 notes
-                        st.markdown(f"""
-                        *{note['timestamp']}* - **{note['type']}** by {note['staff']}:
-                        > {note['note']}
-                        """)
-                    if len(notes) > 5:
-                        with st.expander("View All Notes"):
-                            for note in notes[5:]:
-                                st.markdown(f"""
-                                *{note['timestamp']}* - **{note['type']}** by {note['staff']}:
-                                > {note['note']}
-                                """)
-                else:
-                    st.info("No notes yet")
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def roster_watcher():
+        if roster_versions() != st.session_state.roster_drawn:
+            st.rerun()
 
-            with tab3:
-                incident_note = st.text_input("Incident:", key=f"inc_{child_id}")
-                if st.button("Save Incident", key=f"btn_inc_{child_id}"):
-                    incidents_ref.push({
-                        "timestamp": now_timestamp(),
-                        "staff": staff,
-                        "child": child_name,
-                        "note": incident_note
-                    })
-                    st.success("Incident logged!")
-                    st.rerun()
+    roster_watcher()
 
-            with tab4:
-                new_name = st.text_input("New Name:", value=child_name, key=f"rename_{child_id}")
-                if st.button("Rename Child", key=f"btn_rename_{child_id}"):
-                    if new_name.strip() and new_name != child_name:
-                        assignments_ref.child(child_id).update({"child": new_name.strip()})
-                        logs_ref.push({
-                            "timestamp": now_timestamp(),
-                            "action": "Rename",
-                            "staff": staff,
-                            "child": child_name,
-                            "notes": f"Renamed to {new_name.strip()}"
-                        })
-                        st.success("Child renamed!")
-                        st.rerun()
+    # Active staff's children
+    for row in staff_children(data, staff).to_dict(orient="records"):
+        child_panel(row["id"], staff)
 
-    
+    # Children counts, read straight from the store every LIVE_REFRESH_SECONDS
+    # so they follow Move/Checkout taps in child panels without a full rerun
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def child_counts():
+        assigned = [v.get("staff") for v in store.get("assignments").values()]
+        st.write(f"🧑‍🏫 Under {staff}: **{assigned.count(staff)}**")
+        st.write(f"🏕️ Total in Center: **{len(assigned)}**")
 
-    # Other staff assignments
-    st.write(f"🧑‍🏫 Under {staff}: **{len(rows_with_index)}**")
-    st.write(f"🏕️ Total in Center: **{len(data)}**")
+    child_counts()
 
+    # Other staff assignments
     st.subheader("Other Staff ", divider="gray")
     for other_staff in sorted(STAFF):
         if other_staff != staff:  # Skip current staff
-            other_assignments = data[data["staff"] == other_staff]
+            other_assignments = staff_children(data, other_staff)
             other_rows = other_assignments.sort_values("child").to_dict(orient="records")
             if other_rows:
                 st.write(f"🧑‍🏫 *{other_staff}*: **{len(other_rows)}** -- {staff_lookup.get(other_staff, 'Class 1')}")
-                for j, row in enumerate(other_rows):
-                    child_name = row["child"]
-                    child_id = row["id"]
-                    
-                    # Add bathroom flag indicator if present
-                    bathroom_indicator = "🚽" if child_id in st.session_state.bathroom_flags else ""
-                    with st.expander(f"**{child_name}** {bathroom_indicator}"):
-                        st.write(f"Assigned to: {other_staff} | Location: {staff_lookup.get(other_staff, 'Class 1')}")
-            # Bathroom flag toggle
-                        if child_id in st.session_state.bathroom_flags:
-                            if st.button("🚽", key=f"bathroom_{child_id}"):
-                                st.session_state.bathroom_flags.remove(child_id)
-                                st.rerun()
-                        else:
-                            if st.button("🚽 ", key=f"bathroom_{child_id}"):
-                                st.session_state.bathroom_flags.add(child_id)
-                                st.rerun()
-                        # Add tabs for different actions
-                        tab1, tab2, tab3, tab4 = st.tabs(["🔄 Move", "📝 Notes", "⚠️ Incident", "✏️ Edit"])
-                        
-                        with tab1:
-                            valid_staff_list = STAFF
-                            current_index = valid_staff_list.index(other_staff) if other_staff in valid_staff_list else 0
-                            new_staff_for_child = st.selectbox("Reassign:", valid_staff_list, index=current_index, key=f"move_other_{child_id}")
-                            if st.button("Confirm Move", key=f"btn_move_other_{child_id}"):
-                                assignments_ref.child(child_id).update({"staff": new_staff_for_child, "child": child_name})
-                                logs_ref.push({
-                                    "timestamp": now_timestamp(),
-                                    "action": "Move",
-                                    "staff": new_staff_for_child,
-                                    "child": child_name,
-                                    "notes": f"Moved from {other_staff} to {new_staff_for_child}"
-                                })
-                                st.success("Child reassigned!")
-                                st.rerun()
-
-                           
-                            if f"confirm_checkout_other_{child_id}" not in st.session_state:
-                                st.session_state[f"confirm_checkout_other_{child_id}"] = False
-                            if not st.session_state[f"confirm_checkout_other_{child_id}"]:
-                                if st.button("✅ Check Out", key=f"checkout_other_{child_id}"):
-                                    st.session_state[f"confirm_checkout_other_{child_id}"] = True
-                            else:
-                                st.warning("Confirm checkout?")
-                                col_confirm, col_cancel = st.columns(2)
-                                with col_confirm:
-                                    if st.button("Confirm", key=f"confirm_button_other_{child_id}"):
-                                        assignments_ref.child(child_id).delete()
-                                        logs_ref.push({
-                                            "timestamp": now_timestamp(),
-                                            "action": "Checkout",
-                                            "staff": other_staff,
-                                            "child": child_name,
-                                            "notes": "Checked Out"
-                                        })
-                                        del st.session_state[f"confirm_checkout_other_{child_id}"]
-                                        st.success("Checked out.")
-                                        st.rerun()
-                                with col_cancel:
-                                    if st.button("Cancel", key=f"cancel_button_other_{child_id}"):
-                                        st.session_state[f"confirm_checkout_other_{child_id}"] = False
-                        with tab2:
-                            # Quick note options
-                            quick_notes = ["Bathroom Break", "Snack Time", "Playing Well", "Needs Support", "Great Behavior"]
-                            selected_quick_note = st.selectbox("Quick Notes:", [""] + quick_notes, key=f"quick_note_other_{child_id}")
-                            
-                            # Custom note input
-                            custom_note = st.text_input("Custom Note:", key=f"note_other_{child_id}")
-                            
-                            # Save note button
-                            if st.button("Save Note", key=f"save_note_other_{child_id}"):
-                                note_text = selected_quick_note or custom_note
-                                if note_text:
-                                    logs_ref.push({
-                                        "timestamp": now_timestamp(),
-                                        "action": "Note",
-                                        "staff": other_staff,
-                                        "child": child_name,
-                                        "notes": note_text
-                                    })
-                                    st.success("Note saved!")
-                                    st.rerun()
-                        
-                            # View previous notes
-                            st.write("Previous Notes:")
-                            notes = []
-                            for k, v in logs_data.items():
-                                if v.get("child") == child_name and v.get("action") in ["Note", "Incident"]:
-                                    notes.append({
-                                        "timestamp": v.get("timestamp", ""),
-                                        "type": v.get("action", ""),
-                                        "staff": v.get("staff", ""),
-                                        "note": v.get("notes", "")
-                                    })
-                            
-                            if notes:
-                                notes.sort(key=lambda x: x["timestamp"], reverse=True)
-                                for note in notes[:5]:  # Show last 5 notes
-                                    st.markdown(f"""
-                                    *{note['timestamp']}* - **{note['type']}** by {note['staff']}:
-                                    > {note['note']}
-                                    """)
-                                if len(notes) > 5:
-                                    with st.expander("View All Notes"):
-                                        for note in notes[5:]:
-                                            st.markdown(f"""
-                                            *{note['timestamp']}* - **{note['type']}** by {note['staff']}:
-                                            > {note['note']}
-                                            """)
-                            else:
-                                st.info("No notes yet")
-
-                        with tab3:
-                            incident_note = st.text_input("Incident:", key=f"inc_other_{child_id}")
-                            if st.button("Save Incident", key=f"btn_inc_other_{child_id}"):
-                                incidents_ref.push({
-                                    "timestamp": now_timestamp(),
-                                    "staff": other_staff,
-                                    "child": child_name,
-                                    "note": incident_note
-                                })
-                                st.success("Incident logged!")
-                                st.rerun()
-
-                        with tab4:
-                            new_name = st.text_input("New Name:", value=child_name, key=f"rename_other_{child_id}")
-                            if st.button("Rename Child", key=f"btn_rename_other_{child_id}"):
-                                if new_name.strip() and new_name != child_name:
-                                    assignments_ref.child(child_id).update({"child": new_name.strip()})
-                                    logs_ref.push({
-                                        "timestamp": now_timestamp(),
-                                        "action": "Rename",
-                                        "staff": other_staff,
-                                        "child": child_name,
-                                        "notes": f"Renamed to {new_name.strip()}"
-                                    })
-                                    st.success("Child renamed!")
-                                    st.rerun()
-                    # st.divider()
+                for row in other_rows:
+                    child_panel(row["id"], other_staff, key_prefix="other_")
+
     # SWAP ROLES
     st.divider()
     with st.expander("🔄 Shift Change - Bulk Move"):
@@ -460,10 +551,11 @@ if page == "Staff View":
             to_staff = st.selectbox("To Staff:", STAFF, key="to_swap")
         if st.button("Swap Roles"):
             count = 0
-            staff_assignments = data[data["staff"] == from_staff]
+            data = load_assignments()
+            staff_assignments = staff_children(data, from_staff)
             for _, row in staff_assignments.iterrows():
-                assignments_ref.child(row["id"]).update({"staff": to_staff, "child": row["child"]})
-                logs_ref.push({"timestamp": now_timestamp(), "action": "Role Swap", "staff": to_staff, "child": row["child"], "notes": f"Moved from {from_staff} to {to_staff}"})
+                store.update("assignments", row["id"], {"staff": to_staff, "child": row["child"]})
+                store.push("logs", {"timestamp": now_timestamp(), "action": "Role Swap", "staff": to_staff, "child": row["child"], "child_id": row["child_id"], "notes": f"Moved from {from_staff} to {to_staff}"})
                 count += 1
             st.success(f"Moved {count} children.")
             st.rerun()
@@ -497,12 +589,12 @@ if page == "Admin View":
         with col1:
             if st.button("Confirm Remove All"):
                 # Remove all assignments
-                assignments_data = safe_get(assignments_ref)
+                assignments_data = store.get("assignments")
                 if assignments_data:  # Check if there are any assignments
                     for key in assignments_data.keys():
-                        assignments_ref.child(key).delete()
+                        store.delete("assignments", key)
                     # Log the action
-                    logs_ref.push({
+                    store.push("logs", {
                         "timestamp": now_timestamp(),
                         "action": "EMERGENCY",
                         "staff": "ADMIN",
@@ -521,47 +613,71 @@ if page == "Admin View":
     st.divider()
     
     # Load Firebase data
-    staff_data = safe_get(staff_ref)
-    assignments_data = safe_get(assignments_ref)
-    logs_data = safe_get(logs_ref)
-    incidents_data = safe_get(incidents_ref)
+    staff_data = store.get("staff")
+    assignments_data = store.get("assignments")
+    logs_data = store.get("logs")
+    incidents_data = store.get("incidents")
+    memos_data = store.get("memos")
 
     # Build staff lookup again (for safety)
     staff_lookup = {v["name"]: v.get("location", "N/A") for v in staff_data.values()}
     STAFF = sorted(list(staff_lookup.keys()))
 
+    # Bulk Roster Check-In
+    st.header("📥 Bulk Roster Check-In")
+    roster_file = st.file_uploader("Upload roster CSV (first_name, group, ...):", type=["csv"], key="roster_csv")
+    if roster_file is not None:
+        roster_df = pd.read_csv(roster_file)
+        if "group" not in roster_df.columns:
+            st.warning("Roster needs a `group` column to map children to staff.")
+        else:
+            groups = sorted(roster_df["group"].dropna().astype(str).str.strip().unique())
+            group_to_staff = {}
+            group_cols = st.columns(min(len(groups), 3) or 1)
+            for i, group in enumerate(groups):
+                with group_cols[i % len(group_cols)]:
+                    group_to_staff[group] = st.selectbox(f"Staff for {group}:", [""] + STAFF, key=f"group_staff_{group}")
+
+            plan = plan_import(roster_df, group_to_staff, assignments_data)
+            plan_df = pd.DataFrame(plan, columns=["child", "group", "staff", "status"])
+            ready = int((plan_df["status"] == "ok").sum())
+            st.dataframe(plan_df, use_container_width=True, height=300)
+            st.write(f"**{ready}** ready to check in, **{len(plan_df) - ready}** skipped")
+            if st.button(f"✅ Check In {ready} Children", disabled=not ready):
+                history = store.child_history()
+                store.update_many(import_paths(plan, now_timestamp(), history, assignments_data))
+                st.success(f"✅ Checked in {ready} children")
+                st.rerun()
+
+    st.divider()
+
     # Active Assignments
     st.header("👥 Active Assignments")
 
-    assignment_rows = []
-    for k, v in assignments_data.items():
-        assignment_rows.append({
-            "id": k,
-            "staff": v.get("staff", ""),
-            "child": v.get("child", "")
-        })
-
-    assignments_df = pd.DataFrame(assignment_rows)
+    assignments_df = assignments_frame(assignments_data)
 
     if assignments_df.empty:
         st.success("✅ No active assignments.")
     else:
-        count_by_staff = assignments_df.groupby("staff").size().reset_index(name="Child Count")
-
         with st.expander("📊 Children Count Per Staff", expanded=True):
-            st.dataframe(count_by_staff, use_container_width=True)
+            st.dataframe(count_by_staff(assignments_df), use_container_width=True)
 
         st.subheader("📋 Full Staff Rosters")
-        for staff_member in STAFF:
-            assigned_children = assignments_df[assignments_df["staff"] == staff_member]
-            location = staff_lookup.get(staff_member, "N/A")
-            child_count = len(assigned_children)
-
-            st.markdown(f"#### 👤 {staff_member} — Location: {location} — `{child_count} kids`")
-            if not assigned_children.empty:
-                st.table(assigned_children[["child"]].reset_index(drop=True))
-            else:
-                st.write("No children assigned.")
+        # Every roster in one grid: a row per staff member, children as a list cell
+        children_by_staff = assignments_df.sort_values("child").groupby("staff")["child"].apply(list)
+        rosters_df = pd.DataFrame([{
+            "staff": staff_member,
+            "location": staff_lookup.get(staff_member, "N/A"),
+            "kids": len(children_by_staff.get(staff_member, [])),
+            "children": children_by_staff.get(staff_member, [])
+        } for staff_member in STAFF], columns=["staff", "location", "kids", "children"])
+        st.dataframe(
+            rosters_df,
+            hide_index=True,
+            use_container_width=True,
+            height=min(38 + 35 * len(rosters_df), 600),
+            column_config={"children": st.column_config.ListColumn("children", width="large")}
+        )
 
     st.divider()
 
@@ -570,44 +686,122 @@ if page == "Admin View":
 
     # Date Filter for Logs
     selected_date = st.date_input("Filter Logs by Date:", datetime.datetime.now(MT).date())
-    selected_date_str = selected_date.strftime("%B %d, %Y")
-    
-    # Filter logs by date
-    log_rows = []
-    for k, v in logs_data.items():
-        timestamp = v.get("timestamp", "")
-        if selected_date_str in timestamp:
-            log_rows.append([
-                timestamp,
-                v.get("action", ""),
-                v.get("staff", ""),
-                v.get("child", ""),
-                v.get("notes", "")
-            ])
-
-    logs_df = pd.DataFrame(log_rows, columns=["timestamp", "action", "staff", "child", "notes"])
-
-
-    # All Logs View
-    st.subheader("📄 All Logs")
-    if logs_df.empty:
-        st.success(f"✅ No logs found for {selected_date_str}")
-    else:
-        logs_df["parsed_timestamp"] = pd.to_datetime(logs_df["timestamp"], format="%B %d, %Y %I:%M %p", errors="coerce")
-        logs_df = logs_df.sort_values(by="parsed_timestamp", ascending=False)
+    selected_date_str = selected_date.strftime(DATE_FORMAT)
+
+    # Past days load from their daily_summary/<date> document (one small read)
+    summary = None
+    if selected_date < datetime.datetime.now(MT).date():
+        summary = daily_summary_ref.child(selected_date.isoformat()).get()
+
+    if st.button("📦 Build Daily Summary", help="Roll this date's logs and incidents up into its daily summary"):
+        summary = write_daily_summary(root_ref, logs_data, incidents_data, selected_date, now_timestamp())
+        st.success(f"✅ Summary saved for {selected_date_str}")
+
+    show_raw_logs = True
+    if summary:
+        st.subheader("🗓️ Daily Summary")
+        st.caption(f"{summary.get('log_count', 0)} logs · generated {summary.get('generated', '')}")
+        action_counts = pd.DataFrame(summary.get("action_counts", []), columns=["staff", "hour", "action", "count"])
+        if not action_counts.empty:
+            with st.expander("📈 Log Counts Per Staff", expanded=True):
+                st.dataframe(
+                    action_counts.groupby("staff")["count"].sum().sort_values(ascending=False).reset_index(name="log_count"),
+                    use_container_width=True
+                )
+            with st.expander("🕘 Actions By Staff And Hour"):
+                st.dataframe(action_counts.pivot_table(index="staff", columns="hour", values="count", aggfunc="sum", fill_value=0), use_container_width=True)
+        for title, section in [("🧑‍🤝‍🧑 Headcount Confirmations", "headcounts"), ("🔄 Moves", "moves"), ("✅ Checkouts", "checkouts"), ("🚨 Incidents", "incidents")]:
+            rows = summary.get(section, [])
+            with st.expander(f"{title} ({len(rows)})"):
+                if rows:
+                    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+                else:
+                    st.write("None.")
+        show_raw_logs = st.checkbox("Show raw logs for this date")
 
-        with st.expander("📄 Full Logs", expanded=True):
-            st.dataframe(
-                logs_df.drop(columns=["parsed_timestamp"]),
-                use_container_width=True,
-                height=500
+    if show_raw_logs:
+        # Filter logs by date
+        day_start = datetime.datetime.combine(selected_date, datetime.time())
+        logs_df = logs_on_date(store.logs_between(day_start, day_start + datetime.timedelta(days=1)), selected_date_str)
+
+
+        # All Logs View
+        st.subheader("📄 All Logs")
+        if logs_df.empty:
+            st.success(f"✅ No logs found for {selected_date_str}")
+        else:
+            logs_df = newest_first(logs_df)
+
+            with st.expander("📄 Full Logs", expanded=True):
+                st.dataframe(
+                    logs_df.drop(columns=["parsed_timestamp"]),
+                    use_container_width=True,
+                    height=500
+                )
+
+            with st.expander("📈 Log Counts Per Staff"):
+                st.dataframe(log_counts(logs_df), use_container_width=True)
+
+    st.divider()
+
+    # Export (paged straight from the database, see export_range.py)
+    st.header("📤 Export")
+    today = datetime.datetime.now(MT).date()
+    export_range = st.date_input("Date range:", (today - datetime.timedelta(days=7), today), key="export_range")
+    col_node, col_format = st.columns(2)
+    with col_node:
+        export_node = st.selectbox("Records:", ["logs", "incidents"], format_func=str.title, key="export_node")
+    with col_format:
+        export_format = st.radio("Format:", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+
+    if len(export_range) != 2:
+        st.info("Pick the last day of the range.")
+    elif (export_range[1] - export_range[0]).days >= EXPORT_MAX_DAYS:
+        st.warning(f"Exports here are limited to {EXPORT_MAX_DAYS} days. For longer ranges run "
+                   f"`python export_range.py {export_node} {export_range[0]} {export_range[1]} <file>` on the server.")
+    elif st.button("Prepare Export"):
+        export_start = datetime.datetime.combine(export_range[0], datetime.time())
+        export_end = datetime.datetime.combine(export_range[1], datetime.time()) + datetime.timedelta(days=1)
+        with st.spinner("Exporting..."):
+            export_file = export_records(reference(export_node), export_node, export_start, export_end, MT, export_format)
+        with export_file:
+            extension, mime = EXPORT_FORMATS[export_format]
+            st.download_button(
+                f"⬇️ Download {export_node} {export_range[0]} to {export_range[1]}",
+                data=export_file,
+                file_name=f"{export_node}_{export_range[0]}_{export_range[1]}.{extension}",
+                mime=mime,
             )
 
-        log_counts = logs_df["staff"].value_counts().reset_index()
-        log_counts.columns = ["staff", "log_count"]
+    st.divider()
+
+    # Headcount Timeline
+    st.header("🕑 Headcount Timeline")
+    col_day, col_time = st.columns(2)
+    with col_day:
+        timeline_date = st.date_input("Date:", datetime.datetime.now(MT).date(), key="timeline_date")
+    with col_time:
+        timeline_time = st.time_input("Time:", datetime.datetime.now(MT).time().replace(second=0, microsecond=0), key="timeline_time")
+
+    projection = get_headcount_projection(store.version("logs"))
+    roster_then = by_staff(projection.roster_at(datetime.datetime.combine(timeline_date, timeline_time)))
+    if roster_then:
+        st.dataframe(
+            pd.DataFrame([{"staff": s, "children": len(c), "names": ", ".join(c)} for s, c in roster_then.items()]),
+            use_container_width=True
+        )
+    else:
+        st.info("No children were checked in at that time.")
+
+    with st.expander("🧑‍🤝‍🧑 Reconcile Headcount Confirmations"):
+        reconcile_rows = projection.reconcile_headcounts(logs_data, timeline_date)
+        if reconcile_rows:
+            st.dataframe(pd.DataFrame(reconcile_rows), use_container_width=True)
+        else:
+            st.write("No headcount confirmations on this date.")
 
-        with st.expander("📈 Log Counts Per Staff"):
-            st.dataframe(log_counts, use_container_width=True)
+    if st.button("💾 Store Roster Snapshots", help="Snapshot the roster for new log entries so timeline queries stay fast"):
+        st.success(f"✅ Stored {projection.store_snapshots()} new snapshots")
 
     st.divider()
 
@@ -636,12 +830,12 @@ if page == "Admin View":
             with col1:
                 if st.button("Confirm Remove All"):
                     # Remove all assignments
-                    assignments_data = safe_get(assignments_ref)
+                    assignments_data = store.get("assignments")
                     if assignments_data:  # Check if there are any assignments
                         for key in assignments_data.keys():
-                            assignments_ref.child(key).delete()
+                            store.delete("assignments", key)
                         # Log the action
-                        logs_ref.push({
+                        store.push("logs", {
                             "timestamp": now_timestamp(),
                             "action": "EMERGENCY",
                             "staff": "ADMIN",
@@ -676,7 +870,7 @@ if page == "Admin View":
     if incidents_df.empty:
         st.success("✅ No incidents found.")
     else:
-        incidents_df["parsed_timestamp"] = pd.to_datetime(incidents_df["timestamp"], format="%B %d, %Y %I:%M %p", errors="coerce")
+        incidents_df["parsed_timestamp"] = pd.to_datetime(incidents_df["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
         incidents_df = incidents_df.sort_values(by="parsed_timestamp", ascending=False)
 
         st.dataframe(
@@ -714,7 +908,7 @@ if page == "Admin View":
             if selected_staff_id:
                 staff_name = staff_df[staff_df["id"] == selected_staff_id]["name"].iloc[0]
                 if st.button(f"🗑️ Remove Staff: {staff_name}"):
-                    staff_ref.child(selected_staff_id).delete()
+                    store.delete("staff", selected_staff_id)
                     st.success(f"✅ Removed staff record for {staff_name}")
                     st.rerun()
         else:
@@ -737,7 +931,7 @@ if page == "Admin View":
             if selected_assignment_id:
                 child_name = assignments_df[assignments_df["id"] == selected_assignment_id]["child"].iloc[0]
                 if st.button(f"🗑️ Remove Assignment: {child_name}"):
-                    assignments_ref.child(selected_assignment_id).delete()
+                    store.delete("assignments", selected_assignment_id)
                     st.success(f"✅ Removed assignment record for {child_name}")
                     st.rerun()
         else:
@@ -763,7 +957,7 @@ if page == "Admin View":
             if selected_log_id:
                 log_info = logs_df[logs_df["id"] == selected_log_id].iloc[0]
                 if st.button(f"🗑️ Remove Log: {log_info['timestamp']} - {log_info['action']}"):
-                    logs_ref.child(selected_log_id).delete()
+                    store.delete("logs", selected_log_id)
                     st.success("✅ Removed log record")
                     st.rerun()
         else:
@@ -788,7 +982,7 @@ if page == "Admin View":
             if selected_incident_id:
                 incident_info = incidents_df[incidents_df["id"] == selected_incident_id].iloc[0]
                 if st.button(f"🗑️ Remove Incident: {incident_info['timestamp']} - {incident_info['child']}"):
-                    incidents_ref.child(selected_incident_id).delete()
+                    store.delete("incidents", selected_incident_id)
                     st.success("✅ Removed incident record")
                     st.rerun()
         else:
@@ -812,7 +1006,7 @@ if page == "Admin View":
             if selected_memo_id:
                 memo_info = memos_df[memos_df["id"] == selected_memo_id].iloc[0]
                 if st.button(f"🗑️ Remove Memo: {memo_info['date']} - {memo_info['staff']}"):
-                    memos_ref.child(selected_memo_id).delete()
+                    store.delete("memos", selected_memo_id)
                     st.success("✅ Removed memo record")
                     st.rerun()
         else:
@@ -837,7 +1031,7 @@ if page == "Admin View":
     if incidents_df.empty:
         st.success("✅ No incidents found.")
     else:
-        incidents_df["parsed_timestamp"] = pd.to_datetime(incidents_df["timestamp"], format="%B %d, %Y %I:%M %p", errors="coerce")
+        incidents_df["parsed_timestamp"] = pd.to_datetime(incidents_df["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
         incidents_df = incidents_df.sort_values(by="parsed_timestamp", ascending=False)
 
         st.dataframe(
@@ -853,7 +1047,7 @@ if page == "Memo Management":
     st.title("📝 Memo Management")
 
     # Load memos again
-    memos_data = safe_get(memos_ref)
+    memos_data = store.get("memos")
 
     selected_staff = st.selectbox("Staff for Memo:", STAFF)
     selected_date = st.date_input("Date", datetime.datetime.now(MT).date())
@@ -872,12 +1066,15 @@ if page == "Memo Management":
         if st.button("Save Memo"):
             clean_memo = memo_text.replace("\r\n", "\n")
             data = {"staff": selected_staff, "date": selected_date.isoformat(), "memo": clean_memo}
-            (memos_ref.child(memo_id).update if memo_id else memos_ref.push)(data)
+            if memo_id:
+                store.update("memos", memo_id, data)
+            else:
+                store.push("memos", data)
             st.success("✅ Memo saved!")
             st.rerun()
 
         if memo_id and st.button("Delete Memo"):
-            memos_ref.child(memo_id).delete()
+            store.delete("memos", memo_id)
             st.success("✅ Memo deleted.")
             st.rerun()
 
@@ -900,6 +1097,41 @@ if page == "Memo Management":
                     existing = k
                     break
             data = {"staff": staff_member, "date": bulk_date.isoformat(), "memo": safe_bulk}
-            (memos_ref.child(existing).update if existing else memos_ref.push)(data)
+            if existing:
+                store.update("memos", existing, data)
+            else:
+                store.push("memos", data)
         st.success("✅ Bulk memo assigned")
         st.rerun()
+
+# SEARCH NOTES & INCIDENTS
+
+if page == "Search":
+
+    st.title("🔎 Search Notes & Incidents")
+
+    index = sync_note_index(store.version("logs"), store.version("incidents"))
+
+    search_query = st.text_input("Search:", placeholder='inhaler, "bee sting", ...')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        search_child = st.selectbox("Child:", [""] + index.facet_values("child"))
+    with col2:
+        search_staff = st.selectbox("Staff:", [""] + index.facet_values("staff"))
+    with col3:
+        search_dates = st.date_input("Dates:", value=(), help="Pick a start and end date, or leave empty for the whole season")
+
+    start_date, end_date = (list(search_dates) + [None, None])[:2]
+    if search_query.strip() or search_child or search_staff:
+        started = datetime.datetime.now()
+        hits = index.search(search_query, child=search_child, staff=search_staff, start=start_date, end=end_date or start_date)
+        elapsed_ms = (datetime.datetime.now() - started).total_seconds() * 1000
+        st.caption(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms from {len(index.docs)} indexed notes")
+        if hits:
+            st.dataframe(
+                pd.DataFrame(hits, columns=["timestamp", "kind", "child", "staff", "text"]),
+                use_container_width=True,
+                height=500
+            )
+    else:
+        st.info("Type a word or phrase, or pick a child or staff member.")
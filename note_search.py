@@ -0,0 +1,189 @@
+# note_search.py
+# Inverted index over note text (log "notes" of Note/Incident entries and
+# incident "note"), with child, staff and date facets. The index is updated
+# incrementally from the live store and its docs are saved to disk in the
+# background (at most every SAVE_SECONDS), so a restart rebuilds it from
+# that file instead of re-reading and re-parsing the whole season.
+import gzip
+import json
+import os
+import re
+import threading
+
+from formats import parse_timestamp
+
+INDEXED_LOG_ACTIONS = {"Note", "Incident"}
+INDEX_PATH = os.path.join(".childtracker", "note_index.json.gz")
+SAVE_SECONDS = 30
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def _log_entry(v):
+    if v.get("action") in INDEXED_LOG_ACTIONS and v.get("notes"):
+        return v.get("action", ""), v.get("timestamp", ""), v.get("staff", ""), v.get("child", ""), v.get("notes", "")
+    return None
+
+
+def _incident_entry(v):
+    if v.get("note"):
+        return "Incident Report", v.get("timestamp", ""), v.get("staff", ""), v.get("child", ""), v.get("note", "")
+    return None
+
+
+def _when(timestamp):
+    # Sortable "YYYY-MM-DDTHH:MM" for ordering and the date facet.
+    when = parse_timestamp(timestamp)
+    return when.isoformat(timespec="minutes") if when else ""
+
+
+class NoteIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.docs = {}       # "logs/<key>" -> {"kind", "timestamp", "at", "date", "staff", "child", "text"}
+        self.postings = {}   # token -> set of doc ids
+        self.facets = {"child": {}, "staff": {}, "date": {}}  # facet -> value -> set of doc ids
+        self.changes = 0
+        self._seen = {}  # node -> {key: record object last indexed}
+        self._closed = threading.Event()
+        self._load()
+        if path:
+            threading.Thread(target=self._save_periodically, daemon=True).start()
+
+    # --- PERSISTENCE ---
+    def _load(self):
+        # Only the docs are saved; rebuilding postings and facets from them
+        # is quicker than reading them back.
+        if not self.path:
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                docs = json.load(f)
+        except (OSError, EOFError, ValueError):
+            return
+        for doc_id, doc in docs.items():
+            self._add(doc_id, doc)
+
+    def save(self):
+        # Docs are replaced, never mutated, so a shallow copy is consistent.
+        with self._lock:
+            docs = dict(self.docs)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with gzip.open(tmp, "wb", compresslevel=5) as f:  # one write; json.dump writes in small pieces
+            f.write(json.dumps(docs).encode("utf-8"))
+        os.replace(tmp, self.path)
+
+    def _save_periodically(self):
+        saved_changes = self.changes
+        while not self._closed.wait(SAVE_SECONDS):
+            if self.changes != saved_changes:
+                saved_changes = self.changes
+                try:
+                    self.save()
+                except OSError:
+                    pass
+
+    def close(self):
+        self._closed.set()
+
+    # --- UPDATES ---
+    def _add(self, doc_id, doc):
+        self.docs[doc_id] = doc
+        for token in set(tokenize(doc["text"])):
+            self.postings.setdefault(token, set()).add(doc_id)
+        for facet in self.facets:
+            self.facets[facet].setdefault(doc[facet], set()).add(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self.docs.pop(doc_id)
+        for token in set(tokenize(doc["text"])):
+            ids = self.postings.get(token)
+            if ids:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.postings[token]
+        for facet in self.facets:
+            ids = self.facets[facet].get(doc[facet])
+            if ids:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.facets[facet][doc[facet]]
+
+    def _sync_node(self, name, records, entry):
+        # Live store nodes are copied only along a changed path, so a record
+        # that is the same object as last time is unchanged and skipped.
+        seen = self._seen.get(name)
+        if seen is None:
+            # First sync since loading: drop saved docs whose record is gone.
+            seen = self._seen[name] = {}
+            removed = [d for d in self.docs if d.startswith(name + "/") and d[len(name) + 1:] not in records]
+        else:
+            gone = seen.keys() - records.keys()
+            removed = [f"{name}/{key}" for key in gone]
+            for key in gone:
+                del seen[key]
+        changed = 0
+        for doc_id in removed:
+            if doc_id in self.docs:
+                self._remove(doc_id)
+                changed += 1
+        for key, v in records.items():
+            if seen.get(key) is v:
+                continue
+            seen[key] = v
+            doc_id = f"{name}/{key}"
+            doc = self.docs.get(doc_id)
+            fields = entry(v)
+            if fields is None:
+                if doc:
+                    self._remove(doc_id)
+                    changed += 1
+                continue
+            kind, timestamp, staff, child, text = fields
+            if doc and (doc["text"], doc["child"], doc["staff"], doc["timestamp"]) == (text, child, staff, timestamp):
+                continue
+            if doc:
+                self._remove(doc_id)
+            at = _when(timestamp)
+            self._add(doc_id, {"kind": kind, "timestamp": timestamp, "at": at, "date": at[:10], "staff": staff, "child": child, "text": text})
+            changed += 1
+        return changed
+
+    def sync(self, logs, incidents):
+        """Index entries that are new (or edited) and drop deleted ones. Returns the number of changes."""
+        with self._lock:
+            changed = self._sync_node("logs", logs, _log_entry) + self._sync_node("incidents", incidents, _incident_entry)
+            self.changes += changed
+        return changed
+
+    # --- QUERIES ---
+    def facet_values(self, facet):
+        return sorted(v for v in self.facets[facet] if v)
+
+    def search(self, query, child=None, staff=None, start=None, end=None, limit=200):
+        """Docs containing every query word (and the exact phrase when quoted), newest first."""
+        query = query.strip()
+        phrase = query[1:-1].lower() if len(query) > 1 and query[0] == query[-1] == '"' else None
+        tokens = tokenize(query)
+        with self._lock:
+            candidate_sets = [self.postings.get(t, set()) for t in tokens]
+            if child:
+                candidate_sets.append(self.facets["child"].get(child, set()))
+            if staff:
+                candidate_sets.append(self.facets["staff"].get(staff, set()))
+            if not candidate_sets:
+                return []
+            candidate_sets.sort(key=len)
+            ids = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+            hits = [self.docs[d] for d in ids]
+        if start or end:
+            hits = [h for h in hits if (not start or h["date"] >= start.isoformat()) and (not end or h["date"] <= end.isoformat())]
+        if phrase:
+            hits = [h for h in hits if phrase in h["text"].lower()]
+        hits.sort(key=lambda h: h["at"], reverse=True)
+        return hits[:limit]
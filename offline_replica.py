@@ -0,0 +1,188 @@
+# offline_replica.py
+# Offline-first copy of a staff member's roster, memos and recent notes in
+# SQLite, for Field Trip and Bus runs where Firebase may be out of reach.
+# Reads and writes go to the replica at local-disk speed. Every write is also
+# queued in an outbox: while the database answers, the write is replayed
+# through the LiveStore right away; otherwise a background thread replays
+# the outbox once it answers again.
+#
+# The replica lives on the Streamlit server, not on the phone: it covers the
+# server losing Firebase while phones can still reach the server. A phone
+# that loses its own connection to the server cannot use it.
+#
+# Conflicts: a queued move or checkout is applied only if the child is still
+# with the staff member this device last saw, checked against the database
+# itself (the live store may not have caught up right after reconnecting).
+# Otherwise the change made elsewhere wins, the log entry is still written
+# (marked as an offline conflict) and the conflict is listed for the staff
+# member to check.
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from live_store import new_push_key
+
+REPLICA_PATH = os.path.join(".childtracker", "replica.sqlite")
+SYNC_SECONDS = 15
+RECENT_NOTES = 20  # per child
+NOTE_ACTIONS = ("Note", "Incident")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (id TEXT PRIMARY KEY, staff TEXT, child TEXT, child_id TEXT);
+CREATE INDEX IF NOT EXISTS assignments_staff ON assignments (staff, child);
+CREATE TABLE IF NOT EXISTS memos (staff TEXT, date TEXT, memo TEXT, PRIMARY KEY (staff, date));
+CREATE TABLE IF NOT EXISTS notes (id TEXT PRIMARY KEY, child_id TEXT, timestamp TEXT, action TEXT, staff TEXT, notes TEXT);
+CREATE INDEX IF NOT EXISTS notes_child ON notes (child_id, id);
+CREATE TABLE IF NOT EXISTS outbox (seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, assignment_id TEXT, base_staff TEXT, new_staff TEXT, log_key TEXT, log TEXT);
+CREATE TABLE IF NOT EXISTS conflicts (seq INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, child TEXT, detail TEXT);
+"""
+
+
+class OfflineReplica:
+    def __init__(self, store, probe, read_assignment, path=REPLICA_PATH):
+        """``probe`` is a cheap read that raises when the database is unreachable;
+        ``read_assignment(key)`` reads one assignment from the database."""
+        self.store = store
+        self.probe = probe
+        self.read_assignment = read_assignment
+        self.online = None
+        self.last_sync = None
+        self.last_error = ""
+        self.tracked = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._closed = threading.Event()
+        threading.Thread(target=self._sync_periodically, daemon=True).start()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # --- READS ---
+    def roster(self, staff):
+        return [{"id": i, "child": c, "child_id": cid}
+                for i, c, cid in self._query("SELECT id, child, child_id FROM assignments WHERE staff = ? ORDER BY child", (staff,))]
+
+    def memo(self, staff, date):
+        rows = self._query("SELECT memo FROM memos WHERE staff = ? AND date = ?", (staff, date))
+        return rows[0][0] if rows else ""
+
+    def notes(self, child_id):
+        return [{"timestamp": t, "type": a, "staff": s, "note": n}
+                for t, a, s, n in self._query(
+                    "SELECT timestamp, action, staff, notes FROM notes WHERE child_id = ? ORDER BY id DESC LIMIT ?", (child_id, RECENT_NOTES))]
+
+    def backlog(self):
+        return self._query("SELECT COUNT(*) FROM outbox")[0][0]
+
+    def conflicts(self, limit=20):
+        return [{"timestamp": t, "child": c, "detail": d}
+                for t, c, d in self._query("SELECT timestamp, child, detail FROM conflicts ORDER BY seq DESC LIMIT ?", (limit,))]
+
+    # --- WRITES (local right away, queued for the database) ---
+    def _queue(self, kind, log, assignment_id="", base_staff="", new_staff=""):
+        # The log's push key is chosen now, so the local note and the synced
+        # log entry share an id.
+        key = new_push_key()
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO outbox (kind, assignment_id, base_staff, new_staff, log_key, log) VALUES (?, ?, ?, ?, ?, ?)",
+                             (kind, assignment_id, base_staff, new_staff, key, json.dumps(log)))
+            if log["action"] in NOTE_ACTIONS:
+                self._db.execute("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, log.get("child_id", ""), log["timestamp"], log["action"], log["staff"], log.get("notes", "")))
+            if kind == "move":
+                self._db.execute("UPDATE assignments SET staff = ? WHERE id = ?", (new_staff, assignment_id))
+            elif kind == "checkout":
+                self._db.execute("DELETE FROM assignments WHERE id = ?", (assignment_id,))
+        if self.online:
+            self.sync()  # write through; the outbox only holds changes while offline
+
+    def log(self, entry):
+        self._queue("log", entry)
+
+    def move(self, row, from_staff, to_staff, timestamp):
+        self._queue("move", {"timestamp": timestamp, "action": "Move", "staff": to_staff, "child": row["child"], "child_id": row["child_id"],
+                             "notes": f"Moved from {from_staff} to {to_staff}"}, row["id"], from_staff, to_staff)
+
+    def checkout(self, row, staff, timestamp):
+        self._queue("checkout", {"timestamp": timestamp, "action": "Checkout", "staff": staff, "child": row["child"], "child_id": row["child_id"],
+                                 "notes": "Checked Out"}, row["id"], staff)
+
+    # --- SYNC ---
+    def track(self, staff):
+        """Keep ``staff``'s roster, memos and recent notes in the replica."""
+        if staff not in self.tracked:
+            self.tracked.add(staff)
+            if not self.backlog():
+                self.refresh(staff)
+
+    def refresh(self, staff):
+        # Only called with an empty outbox, so no local change is overwritten.
+        assignments = {k: v for k, v in self.store.get("assignments").items() if v.get("staff") == staff}
+        child_ids = {v.get("child_id") for v in assignments.values() if v.get("child_id")}
+        logs = self.store.get("logs")
+        recent = {}
+        for key in sorted(logs, reverse=True):
+            v = logs[key]
+            if v.get("child_id") in child_ids and v.get("action") in NOTE_ACTIONS and len(recent.setdefault(v["child_id"], [])) < RECENT_NOTES:
+                recent[v["child_id"]].append((key, v))
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM assignments WHERE staff = ?", (staff,))
+            self._db.executemany("INSERT OR REPLACE INTO assignments VALUES (?, ?, ?, ?)",
+                                 [(k, staff, v.get("child", ""), v.get("child_id", "")) for k, v in assignments.items()])
+            self._db.execute("DELETE FROM memos WHERE staff = ?", (staff,))
+            self._db.executemany("INSERT OR REPLACE INTO memos VALUES (?, ?, ?)",
+                                 [(staff, v.get("date", ""), v.get("memo", "")) for v in self.store.get("memos").values() if v.get("staff") == staff])
+            self._db.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?)",
+                                 [(k, v["child_id"], v.get("timestamp", ""), v["action"], v.get("staff", ""), v.get("notes", ""))
+                                  for entries in recent.values() for k, v in entries])
+
+    def _paths(self, kind, assignment_id, base_staff, new_staff, log_key, log):
+        # Multi-path write for one outbox entry: the assignment change (if it
+        # still applies) and its log entry land together.
+        paths, conflict = {}, None
+        if kind in ("move", "checkout"):
+            current = self.read_assignment(assignment_id)
+            if not current or current.get("staff") != base_staff:
+                detail = "already checked out" if not current else f"now with {current.get('staff', '')}"
+                log = dict(log, notes=f"{log.get('notes', '')} [offline conflict: {detail}]")
+                conflict = (log["timestamp"], log.get("child", ""), f"{log['action']} not applied: {detail}")
+            elif kind == "move":
+                paths[f"assignments/{assignment_id}"] = dict(current, staff=new_staff)
+            else:
+                paths[f"assignments/{assignment_id}"] = None
+        paths[f"logs/{log_key}"] = log
+        return paths, conflict
+
+    def sync(self):
+        """Replay the outbox in order; stops at the first failure and keeps the rest."""
+        with self._sync_lock:
+            try:
+                self.probe()
+                for seq, kind, assignment_id, base_staff, new_staff, log_key, log in self._query("SELECT * FROM outbox ORDER BY seq"):
+                    paths, conflict = self._paths(kind, assignment_id, base_staff, new_staff, log_key, json.loads(log))
+                    self.store.update_many(paths)
+                    with self._lock, self._db:
+                        self._db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+                        if conflict:
+                            self._db.execute("INSERT INTO conflicts (timestamp, child, detail) VALUES (?, ?, ?)", conflict)
+            except Exception as e:  # network errors surface as several exception types
+                self.online, self.last_error = False, str(e)
+                return False
+            self.online, self.last_sync, self.last_error = True, time.time(), ""
+            for staff in list(self.tracked):
+                self.refresh(staff)
+            return True
+
+    def _sync_periodically(self):
+        self.sync()  # find out right away whether writes can go straight through
+        while not self._closed.wait(SYNC_SECONDS):
+            self.sync()
+
+    def close(self):
+        self._closed.set()
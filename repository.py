@@ -0,0 +1,103 @@
+# repository.py
+# The storage interface main.py talks to for the five app nodes (staff,
+# assignments, logs, incidents, memos), with two implementations:
+#
+#   FirebaseRepository  the listener-fed LiveStore over the Realtime Database
+#   SqlRepository       SQLite with indexes on child, staff and time (sql_db.py)
+#
+# secrets: [database] backend = "firebase" (default), "local" or "sqlite".
+# With [database] cache = "host:port", replicas use a CachedRepository
+# (shared_cache.py) served by one cache process instead.
+import abc
+import datetime
+
+from child_ids import ChildHistory
+from formats import DATE_FORMAT, parse_timestamp
+from live_store import LiveStore
+
+
+class Repository(abc.ABC):
+    """Records are plain dicts keyed by push key, as in the Realtime Database."""
+
+    synced = None          # threading.Event, set once reads reflect the database
+    snapshot_saved = None  # time of the on-disk snapshot served until synced, if any
+    _history = (None, None)  # (logs and incidents versions, ChildHistory)
+
+    # --- READS ---
+    @abc.abstractmethod
+    def get(self, name):
+        """Every record of a node as {key: value}. Do not mutate the result."""
+
+    @abc.abstractmethod
+    def version(self, name):
+        """Changes whenever the node does, for caching data derived from it."""
+
+    # --- WRITES ---
+    @abc.abstractmethod
+    def push(self, name, value):
+        """Add a record under a new push key and return the key."""
+
+    @abc.abstractmethod
+    def update(self, name, key, value):
+        """Merge ``value``'s fields into a record."""
+
+    @abc.abstractmethod
+    def update_many(self, paths):
+        """Write {"node/key": value} (None deletes) all at once."""
+
+    @abc.abstractmethod
+    def delete(self, name, key):
+        """Remove a record."""
+
+    # --- QUERIES ---
+    @abc.abstractmethod
+    def child_logs(self, child_id, actions=None):
+        """A child's log entries, oldest first, optionally only some actions."""
+
+    @abc.abstractmethod
+    def child_incidents(self, child_id):
+        """A child's incidents, oldest first."""
+
+    @abc.abstractmethod
+    def logs_between(self, start, end):
+        """Log entries with start <= timestamp < end as {key: value}, oldest first."""
+
+    def child_history(self):
+        """The process's one ChildHistory, brought up to date with new records."""
+        versions = (self.version("logs"), self.version("incidents"))
+        seen, history = self._history
+        if history is None:
+            history = ChildHistory()
+        if seen != versions:
+            history.sync(self.get("logs"), self.get("incidents"))
+            self._history = (versions, history)
+        return history
+
+
+class InMemoryQueries(Repository):
+    # Queries answered from get(), for repositories that hold whole nodes in
+    # memory; the per-child index only takes in new records per version.
+    def child_logs(self, child_id, actions=None):
+        return self.child_history().log_entries(child_id, self.get("logs"), actions)
+
+    def child_incidents(self, child_id):
+        return self.child_history().incident_entries(child_id, self.get("incidents"))
+
+    def logs_between(self, start, end):
+        # Only timestamps on one of the range's dates are parsed: the date
+        # check is a string split, strptime is what costs.
+        days = {(start + datetime.timedelta(days=n)).strftime(DATE_FORMAT) for n in range((end - start).days + 1)}
+        found = []
+        for key, v in self.get("logs").items():
+            timestamp = str(v.get("timestamp", ""))
+            if timestamp.rsplit(" ", 2)[0] not in days:
+                continue
+            when = parse_timestamp(timestamp)
+            if when and start <= when < end:
+                found.append((when, key, v))
+        found.sort(key=lambda f: (f[0], f[1]))
+        return {key: v for _, key, v in found}
+
+
+class FirebaseRepository(LiveStore, InMemoryQueries):
+    pass
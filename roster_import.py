@@ -0,0 +1,60 @@
+# roster_import.py
+# Bulk morning check-in from a roster CSV (see demo.csv): every row becomes an
+# assignment plus an "Add" log entry, all written in one multi-path update.
+from formats import normalize
+from live_store import new_push_key
+
+NAME_COLUMNS = ["first_name", "last_name", "name", "child"]
+
+
+def child_name(row):
+    # Same convention as "Add Child": First + Last Initial.
+    if str(row.get("child") or row.get("name") or "").strip():
+        return str(row.get("child") or row.get("name")).strip()
+    first = str(row.get("first_name") or "").strip()
+    last = str(row.get("last_name") or "").strip()
+    return f"{first} {last[0]}".strip() if last else first
+
+
+def plan_import(roster_df, group_to_staff, assignments):
+    """Return one row per CSV line with the child, target staff and status.
+
+    Status is "ok" for rows that will be imported, otherwise the reason the
+    row is skipped (missing name, unmapped group, duplicate in the file, or
+    already checked in).
+    """
+    assigned = {normalize(v.get("child", "")): v.get("staff", "") for v in assignments.values()}
+    seen = set()
+    plan = []
+    for row in roster_df.fillna("").to_dict(orient="records"):
+        name = child_name(row)
+        group = str(row.get("group", "")).strip()
+        staff = group_to_staff.get(group, "")
+        key = normalize(name)
+        if not name:
+            status = "missing name"
+        elif not staff:
+            status = f"no staff for group '{group}'" if group else "no group"
+        elif key in seen:
+            status = "duplicate in file"
+        elif key in assigned:
+            status = f"already with {assigned[key]}"
+        else:
+            status = "ok"
+        seen.add(key)
+        plan.append({"child": name, "group": group, "staff": staff, "status": status})
+    return plan
+
+
+def import_paths(plan, timestamp, history=None, assignments=None):
+    # Multi-path update body for the database root: assignment and log in one write.
+    # ``history`` (a child_ids.ChildHistory) gives returning children their previous id,
+    # unless a checked-in child (in ``assignments``) already has it.
+    paths = {}
+    for row in plan:
+        if row["status"] != "ok":
+            continue
+        child_id = history.id_for(row["child"], assignments) if history else new_push_key()
+        paths[f"assignments/{new_push_key()}"] = {"staff": row["staff"], "child": row["child"], "child_id": child_id}
+        paths[f"logs/{new_push_key()}"] = {"timestamp": timestamp, "action": "Add", "staff": row["staff"], "child": row["child"], "child_id": child_id, "notes": "Added (roster import)"}
+    return paths
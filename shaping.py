@@ -0,0 +1,74 @@
+# shaping.py
+# The data-shaping steps behind main.py's pages as plain functions over the
+# node dicts (no Streamlit calls), so they can be timed by bench.py.
+import pandas as pd
+
+from formats import TIMESTAMP_FORMAT
+
+NOTE_ACTIONS = ["Note", "Incident"]
+LOG_COLUMNS = ["timestamp", "action", "staff", "child", "notes"]
+
+
+def assignments_frame(assignments):
+    rows = []
+    for k, v in assignments.items():
+        rows.append({
+            "id": k,
+            "staff": v.get("staff", ""),
+            "child": v.get("child", ""),
+            "child_id": v.get("child_id", "")
+        })
+    return pd.DataFrame(rows, columns=["id", "staff", "child", "child_id"])
+
+
+def staff_children(assignments_df, staff):
+    return assignments_df[assignments_df["staff"] == staff]
+
+
+def notes_by_name(logs, child_name):
+    # Fallback for children without a child_id: scan every log by name
+    return sorted(
+        (v for v in logs.values() if v.get("child") == child_name and v.get("action") in NOTE_ACTIONS),
+        key=lambda v: v.get("timestamp", ""), reverse=True
+    )
+
+
+def note_rows(entries):
+    return [{
+        "timestamp": v.get("timestamp", ""),
+        "type": v.get("action", ""),
+        "staff": v.get("staff", ""),
+        "note": v.get("notes", "")
+    } for v in entries]
+
+
+def logs_on_date(logs, date_str):
+    rows = []
+    for v in logs.values():
+        timestamp = v.get("timestamp", "")
+        if date_str in timestamp:
+            rows.append([timestamp, v.get("action", ""), v.get("staff", ""), v.get("child", ""), v.get("notes", "")])
+    return pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+
+def newest_first(df):
+    df = df.copy()
+    df["parsed_timestamp"] = pd.to_datetime(df["timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    return df.sort_values(by="parsed_timestamp", ascending=False)
+
+
+def todays_memo(memos, staff, today_iso):
+    for v in memos.values():
+        if v.get("staff") == staff and v.get("date") == today_iso:
+            return v.get("memo", "")
+    return ""
+
+
+def count_by_staff(assignments_df):
+    return assignments_df.groupby("staff").size().reset_index(name="Child Count")
+
+
+def log_counts(logs_df):
+    counts = logs_df["staff"].value_counts().reset_index()
+    counts.columns = ["staff", "log_count"]
+    return counts
@@ -0,0 +1,311 @@
+# shared_cache.py
+# Shared cache tier for running several Streamlit replicas behind a load
+# balancer. One cache process holds the only LiveStore (one set of Firebase
+# listeners and the on-disk snapshot), and every replica reads node
+# snapshots from it and sends its writes through it, so adding replicas
+# does not add Firebase downloads. Replicas subscribe to invalidations and
+# only re-fetch a node after it has changed. Short-lived flags (the bathroom
+# flags) live in the cache process too, so every replica sees them.
+#
+#   python shared_cache.py --port 8765           # the cache process
+#   [database] cache = "127.0.0.1:8765"          # replicas (secrets)
+#   [database] cache_token = "..."               # both: shared secret, required
+#
+# Every request carries the token; a connection sending a wrong one is
+# dropped. The token and the data travel unencrypted, so keep the port on a
+# private network. Writes are limited to records of the app nodes
+# ("<node>/<key>" or "<node>/<key>/<field>").
+#
+# Protocol: one JSON object per line over TCP, each with "token".
+#   {"op": "get", "node": n}                  -> {"epoch", "version", "data"}
+#   {"op": "write", "paths": {...}}           -> {"epoch", "versions"}   (multi-path update at the root)
+#   {"op": "flag", "name", "key", "ttl": s}   -> {"epoch"}   (ttl null clears the flag)
+#   {"op": "subscribe"}                       -> {"epoch", "versions", "flags"}, then per change
+#                                                {"node", "version"} or {"flag", "key", "ttl", "remaining"}
+import argparse
+import hmac
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+
+from live_store import NODES, new_push_key
+from repository import InMemoryQueries
+from transient_state import TransientFlags
+
+RECONNECT_SECONDS = 2
+
+
+def check_paths(paths):
+    """Raise ValueError unless every path is a record (or record field) of an app node."""
+    if not isinstance(paths, dict):
+        raise ValueError("paths must be an object")
+    for path in paths:
+        parts = path.split("/")
+        if parts[0] not in NODES or len(parts) not in (2, 3) or not all(parts[1:]):
+            raise ValueError(f"refusing to write {path!r}")
+
+
+# --- SERVER ---
+class CacheServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, store, token):
+        if not token:
+            raise ValueError("the cache process needs a shared token ([database] cache_token)")
+        super().__init__(address, CacheHandler)
+        self.store = store
+        self.token = token.encode()
+        self.epoch = uuid.uuid4().hex  # lets replicas notice a restarted server
+        self.flags = {}  # name -> TransientFlags
+        self._subscribers = []
+        self._lock = threading.Lock()
+        store.watchers.append(self.publish)
+
+    def authorized(self, request):
+        return hmac.compare_digest(str(request.get("token", "")).encode(), self.token)
+
+    def versions(self):
+        return {name: self.store.version(name) for name in NODES}
+
+    def flag_items(self):
+        return {name: {"ttl": flags.ttl, "items": flags.items()} for name, flags in list(self.flags.items())}
+
+    def set_flag(self, name, key, ttl):
+        with self._lock:
+            if ttl and name not in self.flags:
+                self.flags[name] = TransientFlags(ttl)
+            flags = self.flags.get(name)
+        if flags is None:
+            return
+        if ttl:
+            flags.set(key)
+        else:
+            flags.clear(key)
+        self._broadcast({"flag": name, "key": key, "ttl": flags.ttl, "remaining": flags.remaining(key)})
+
+    def publish(self, name):
+        self._broadcast({"node": name, "version": self.store.version(name)})
+
+    def _broadcast(self, message):
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.put(message)
+
+    def subscribe(self):
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.remove(subscriber)
+
+
+class CacheHandler(socketserver.StreamRequestHandler):
+    def send(self, message):
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        server = self.server
+        for line in self.rfile:
+            request = json.loads(line)
+            if not server.authorized(request):
+                self.send({"error": "unauthorized"})
+                return
+            op = request.get("op")
+            try:
+                if op == "get":
+                    self.send({"epoch": server.epoch, "version": server.store.version(request["node"]), "data": server.store.get(request["node"])})
+                elif op == "write":
+                    check_paths(request["paths"])
+                    server.store.update_many(request["paths"])
+                    self.send({"epoch": server.epoch, "versions": server.versions()})
+                elif op == "flag":
+                    server.set_flag(str(request["name"]), str(request["key"]), request.get("ttl"))
+                    self.send({"epoch": server.epoch})
+                elif op == "subscribe":
+                    self.stream_invalidations()
+                    return
+                else:
+                    self.send({"error": f"unknown op {op!r}"})
+            except Exception as e:  # report database errors to the replica instead of dropping it
+                self.send({"error": str(e)})
+
+    def stream_invalidations(self):
+        subscriber = self.server.subscribe()
+        try:
+            self.send({"epoch": self.server.epoch, "versions": self.server.versions(), "flags": self.server.flag_items()})
+            while True:
+                self.send(subscriber.get())
+        except OSError:
+            pass
+        finally:
+            self.server.unsubscribe(subscriber)
+
+
+# --- REPLICA SIDE ---
+class CachedRepository(InMemoryQueries):
+    """Repository backed by the cache process; nodes are fetched only after they change."""
+
+    def __init__(self, address, token):
+        host, _, port = address.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port))
+        self.token = token
+        self.synced = threading.Event()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._epoch = None
+        self._versions = {}
+        self._cache = {}  # node -> (version, data)
+        self._flags = {}  # name -> TransientFlags mirroring the cache process
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _request(self, message):
+        message = dict(message, token=self.token)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        self._conn = socket.create_connection(self.address).makefile("rwb")
+                    self._conn.write(json.dumps(message).encode() + b"\n")
+                    self._conn.flush()
+                    reply = json.loads(self._conn.readline())
+                    break
+                except (OSError, ValueError):
+                    self._conn = None
+                    if attempt:
+                        raise
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        self._set_epoch(reply["epoch"])
+        return reply
+
+    def _set_epoch(self, epoch):
+        if epoch != self._epoch:
+            self._epoch, self._cache, self._versions = epoch, {}, {}
+
+    def _listen(self):
+        # Invalidation stream; reconnects (and drops the cache) if the server goes away.
+        while True:
+            try:
+                with socket.create_connection(self.address) as sock, sock.makefile("rwb") as stream:
+                    stream.write(json.dumps({"op": "subscribe", "token": self.token}).encode() + b"\n")
+                    stream.flush()
+                    hello = json.loads(stream.readline())
+                    if "error" in hello:
+                        raise ValueError(hello["error"])
+                    self._set_epoch(hello["epoch"])
+                    self._versions.update(hello["versions"])
+                    self._load_flags(hello["flags"])
+                    self.synced.set()
+                    for line in stream:
+                        message = json.loads(line)
+                        if "flag" in message:
+                            self._mirror_flag(message)
+                        else:
+                            self._versions[message["node"]] = max(message["version"], self._versions.get(message["node"], 0))
+            except (OSError, ValueError):
+                pass
+            self._cache = {}
+            time.sleep(RECONNECT_SECONDS)
+
+    # --- SHARED FLAGS ---
+    def _load_flags(self, flags):
+        # The server's flags replace the mirror on every (re)connect.
+        mirror = {name: TransientFlags(f.ttl) for name, f in self._flags.items()}
+        for name, saved in flags.items():
+            mirror[name] = TransientFlags(saved["ttl"])
+            for key, remaining in saved["items"]:
+                mirror[name].set(key, remaining)
+        self._flags = mirror
+
+    def _mirror_flag(self, message):
+        flags = self._flags.setdefault(message["flag"], TransientFlags(message["ttl"]))
+        if message["remaining"] is None:
+            flags.clear(message["key"])
+        else:
+            flags.set(message["key"], message["remaining"])
+
+    def flags(self, name, ttl):
+        """Flags like transient_state.TransientFlags, shared by every replica."""
+        return CachedFlags(self, name, ttl)
+
+    # --- READS ---
+    def get(self, name):
+        cached = self._cache.get(name)
+        if not cached or cached[0] != self._versions.get(name):
+            reply = self._request({"op": "get", "node": name})
+            cached = self._cache[name] = (reply["version"], reply["data"])
+            self._versions[name] = max(reply["version"], self._versions.get(name, 0))
+        return cached[1]
+
+    def version(self, name):
+        return (self._epoch, self._versions.get(name, 0))
+
+    # --- WRITES (through the cache process, which writes to Firebase) ---
+    def update_many(self, paths):
+        reply = self._request({"op": "write", "paths": paths})
+        self._versions.update(reply["versions"])  # read-your-writes before the invalidation arrives
+
+    def push(self, name, value):
+        key = new_push_key()
+        self.update_many({f"{name}/{key}": value})
+        return key
+
+    def update(self, name, key, value):
+        self.update_many({f"{name}/{key}/{field}": v for field, v in value.items()})
+
+    def delete(self, name, key):
+        self.update_many({f"{name}/{key}": None})
+
+
+class CachedFlags:
+    # Set and clear go through the cache process; remaining() reads the
+    # replica's mirror, which the invalidation stream keeps current.
+    def __init__(self, repo, name, ttl):
+        self.repo = repo
+        self.name = name
+        self.ttl = ttl
+
+    def _mirror(self):
+        return self.repo._flags.setdefault(self.name, TransientFlags(self.ttl))
+
+    def set(self, key):
+        self.repo._request({"op": "flag", "name": self.name, "key": key, "ttl": self.ttl})
+        self._mirror().set(key)  # read-your-writes before the stream echoes it
+
+    def clear(self, key):
+        self.repo._request({"op": "flag", "name": self.name, "key": key, "ttl": None})
+        self._mirror().clear(key)
+
+    def remaining(self, key):
+        return self._mirror().remaining(key)
+
+    def version(self, resolution=60):
+        mirror = self._mirror()  # replaced on reconnect, which counts as a change
+        return (id(mirror), mirror.version(resolution))
+
+
+if __name__ == "__main__":
+    from database import BACKEND, CACHE_TOKEN, reference
+    from live_store import LiveStore, SNAPSHOT_PATH
+
+    parser = argparse.ArgumentParser(description="Serve the app nodes to Streamlit replicas from one LiveStore.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if not CACHE_TOKEN:
+        parser.error("set [database] cache_token in the secrets (the same value on every replica)")
+
+    store = LiveStore({name: reference(name) for name in NODES}, root=reference("/"),
+                      snapshot_path=None if BACKEND == "local" else SNAPSHOT_PATH)
+    with CacheServer((args.host, args.port), store, CACHE_TOKEN) as server:
+        print(f"✅ shared cache on {args.host}:{args.port} (epoch {server.epoch})")
+        server.serve_forever()
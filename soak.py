@@ -0,0 +1,219 @@
+# soak.py
+# Concurrent-session soak run of main.py against the local database stand-in.
+# Simulates staff sessions clicking through Staff View actions while admins
+# page the Admin View, then checks rerun latency, database operations per
+# interaction and peak memory against budgets. Exits 1 when a budget is blown.
+#
+# AppTest patches process-wide state on every run, so sessions cannot run on
+# separate threads. Each session is a generator that yields whenever it wants
+# a rerun, and the driver interleaves them one step at a time so every
+# session's reruns land between the other sessions' writes.
+#
+#   python soak.py
+#   python soak.py --staff 50 --admins 5 --rounds 2 --budget p95_ms=6000
+import argparse
+import datetime
+import random
+import resource
+import sys
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import local_db
+from formats import format_timestamp
+
+BUDGETS = {
+    "p50_ms": 3000,
+    "p95_ms": 6000,
+    "p99_ms": 8000,
+    "ops_per_interaction": 6,
+    "peak_mb": 1024,
+}
+
+ACTIONS = ["Accurate Headcount", "Ate", "Hydration", "Sunscreen"]
+DB_SECTIONS = ["Staff Records", "Assignment Records", "Log Records", "Incident Records", "Memo Records"]
+
+
+# --- SEED DATA ---
+def seed(staff_count, children_per_staff, logs_count, rng):
+    names = [f"Staff {i:02d}" for i in range(1, staff_count + 1)]
+    data = {"staff": {}, "assignments": {}, "logs": {}, "incidents": {}, "memos": {}}
+    for i, name in enumerate(names):
+        data["staff"][f"s{i:03d}"] = {"name": name, "location": "Class 1"}
+        data["memos"][f"m{i:03d}"] = {"staff": name, "date": datetime.date.today().isoformat(), "memo": "Soak memo"}
+        for c in range(children_per_staff):
+            data["assignments"][f"a{i:03d}{c:02d}"] = {"staff": name, "child": f"Child {i:02d}-{c:02d}"}
+    children = [v["child"] for v in data["assignments"].values()]
+    start = datetime.datetime(2025, 6, 2, 8, 0)
+    for n in range(logs_count):
+        stamp = format_timestamp(start + datetime.timedelta(minutes=7 * n))
+        data["logs"][f"l{n:07d}"] = {"timestamp": stamp, "action": rng.choice(["Note", "Ate", "Hydration"]),
+                                     "staff": rng.choice(names), "child": rng.choice(children), "notes": "Seeded"}
+    local_db.reset(data)
+    return names
+
+
+# --- SESSIONS ---
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.ops = []
+
+    def run(self, at):
+        ops_before = sum(local_db.ops.values())
+        start = time.perf_counter()
+        at.run()
+        self.latencies.append(time.perf_counter() - start)
+        self.ops.append(sum(local_db.ops.values()) - ops_before)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+
+def interleave(sessions, rec):
+    errors = []
+    active = list(sessions)
+    while active:
+        print(f"  {len(rec.latencies)} interactions, {len(active)} sessions active", flush=True)
+        for session in list(active):
+            try:
+                rec.run(next(session))
+            except StopIteration:
+                active.remove(session)
+            except Exception as e:
+                errors.append(e)
+                active.remove(session)
+    return errors
+
+
+def new_session(timeout):
+    at = AppTest.from_file("main.py", default_timeout=timeout)
+    at.secrets["database"] = {"backend": "local"}
+    return at
+
+
+def own_keys(at, prefix):
+    return [b.key for b in at.button if b.key and b.key.startswith(prefix) and "_other_" not in b.key]
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def selectbox(at, label):
+    return next(s for s in at.selectbox if s.label == label)
+
+
+def staff_session(name, names, rounds, rng, timeout):
+    at = new_session(timeout)
+    yield at
+    selectbox(at, "Select Staff:").select(name)
+    yield at
+    for _ in range(rounds):
+        at.selectbox(key="act").select(rng.choice(ACTIONS))
+        button(at, "Confirm Action").click()
+        yield at
+
+        notes = own_keys(at, "save_note_")
+        if notes:
+            child_id = rng.choice(notes)[len("save_note_"):]
+            at.text_input(key=f"note_{child_id}").input("Soak note")
+            at.button(key=f"save_note_{child_id}").click()
+            yield at
+
+        moves = own_keys(at, "btn_move_")
+        if moves:
+            child_id = rng.choice(moves)[len("btn_move_"):]
+            at.selectbox(key=f"move_{child_id}").select(rng.choice(names))
+            at.button(key=f"btn_move_{child_id}").click()
+            yield at
+
+        checkouts = own_keys(at, "checkout_")
+        if checkouts:
+            child_id = rng.choice(checkouts)[len("checkout_"):]
+            at.button(key=f"checkout_{child_id}").click()
+            yield at
+            if f"confirm_button_{child_id}" in own_keys(at, "confirm_button_"):
+                at.button(key=f"confirm_button_{child_id}").click()
+                yield at
+
+
+def admin_session(rounds, rng, timeout):
+    at = new_session(timeout)
+    yield at
+    at.sidebar.radio[0].set_value("Admin View")
+    yield at
+    for _ in range(rounds):
+        at.date_input[0].set_value(datetime.date(2025, 6, 2) + datetime.timedelta(days=rng.randrange(30)))
+        yield at
+        for section in DB_SECTIONS:
+            selectbox(at, "Select Database:").set_value(section)
+            yield at
+
+
+# --- REPORT ---
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_budgets(pairs):
+    budgets = dict(BUDGETS)
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        if key not in budgets:
+            raise SystemExit(f"Unknown budget {key!r}; expected one of {', '.join(budgets)}")
+        budgets[key] = float(value)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak main.py with interleaved AppTest sessions.")
+    parser.add_argument("--staff", type=int, default=50, help="staff sessions")
+    parser.add_argument("--admins", type=int, default=5, help="admin sessions")
+    parser.add_argument("--rounds", type=int, default=2, help="action rounds per session")
+    parser.add_argument("--children", type=int, default=4, help="children per staff member")
+    parser.add_argument("--logs", type=int, default=5000, help="seeded log entries")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget", action="append", metavar="NAME=VALUE", help="override a budget")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    rng = random.Random(args.seed)
+    names = seed(args.staff, args.children, args.logs, rng)
+    st.cache_resource.clear()
+
+    sessions = [staff_session(name, names, args.rounds, random.Random(rng.random()), args.timeout) for name in names]
+    sessions += [admin_session(args.rounds, random.Random(rng.random()), args.timeout) for _ in range(args.admins)]
+    rec = Recorder()
+    errors = interleave(sessions, rec)
+
+    ms = [t * 1000 for t in rec.latencies]
+    results = {
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "ops_per_interaction": sum(rec.ops) / max(len(rec.ops), 1),
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+    print(f"{args.staff} staff + {args.admins} admin sessions, {len(rec.latencies)} interactions")
+    print(f"database ops: {dict(local_db.ops)}")
+    failures = []
+    for key, value in results.items():
+        status = "ok" if value <= budgets[key] else "OVER"
+        if status == "OVER":
+            failures.append(key)
+        print(f"  {key:<20} {value:>10.1f}   budget {budgets[key]:>8.1f}   {status}")
+    for error in errors:
+        print(f"session error: {error!r}")
+
+    if failures or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
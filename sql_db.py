@@ -0,0 +1,285 @@
+# sql_db.py
+# Self-hosted storage in SQLite (secrets: [database] backend = "sqlite",
+# path = "childtracker.sqlite"). Every node's records live in one table with
+# indexes on child_id, child, staff and timestamp, so per-child history and
+# date-range reads are indexed lookups instead of Python loops over the
+# whole node. Two entry points:
+#
+#   reference(path)  the slice of firebase_admin.db.Reference the app and the
+#                    command-line jobs use (paths are "node/key/field...")
+#   SqlRepository    the repository.Repository main.py reads and writes
+import json
+import sqlite3
+import threading
+from collections import Counter
+
+from formats import parse_timestamp
+from live_store import new_push_key
+from repository import Repository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    node TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    child_id TEXT,
+    child TEXT,
+    staff TEXT,
+    at TEXT,  -- ISO "YYYY-MM-DDTHH:MM" parsed from "timestamp", sorts in time order
+    PRIMARY KEY (node, key)
+);
+CREATE INDEX IF NOT EXISTS records_child_id ON records (node, child_id, key);
+CREATE INDEX IF NOT EXISTS records_child ON records (node, child, key);
+CREATE INDEX IF NOT EXISTS records_staff ON records (node, staff, key);
+CREATE INDEX IF NOT EXISTS records_at ON records (node, at, key);
+"""
+
+_lock = threading.RLock()
+_conn = None
+_data_version = None
+_generation = 0  # bumped whenever another process has written
+_versions = Counter()  # node -> writes by this process
+
+
+def connect(path):
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(path, check_same_thread=False)
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _split(path):
+    return [p for p in path.split("/") if p]
+
+
+def _at(value):
+    when = parse_timestamp(value.get("timestamp")) if isinstance(value, dict) else None
+    return when.isoformat(timespec="minutes") if when else None
+
+
+def _field(value, name):
+    return value.get(name) if isinstance(value, dict) else None
+
+
+def _set_in(tree, parts, value):
+    # Nested write inside one record's JSON (None deletes), like _set_path in live_store.py.
+    if not parts:
+        return value
+    tree = dict(tree) if isinstance(tree, dict) else {}
+    child = _set_in(tree.get(parts[0]), parts[1:], value)
+    if child is None:
+        tree.pop(parts[0], None)
+    else:
+        tree[parts[0]] = child
+    return tree or None
+
+
+# --- RECORD ACCESS (callers hold _lock) ---
+def _read_record(node, key):
+    row = _conn.execute("SELECT value FROM records WHERE node = ? AND key = ?", (node, key)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _write_record(node, key, value):
+    if value is None:
+        _conn.execute("DELETE FROM records WHERE node = ? AND key = ?", (node, key))
+    else:
+        _conn.execute(
+            "INSERT OR REPLACE INTO records (node, key, value, child_id, child, staff, at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (node, key, json.dumps(value), _field(value, "child_id"), _field(value, "child"), _field(value, "staff"), _at(value)),
+        )
+    _versions[node] += 1
+
+
+def _read_node(node):
+    return {k: json.loads(v) for k, v in _conn.execute("SELECT key, value FROM records WHERE node = ? ORDER BY key", (node,))}
+
+
+def _write(parts, value):
+    if not parts:
+        for node in [r[0] for r in _conn.execute("SELECT DISTINCT node FROM records")]:
+            _write(_split(node), None)
+        for node, records in (value or {}).items():
+            _write([node], records)
+    elif len(parts) == 1:
+        _conn.execute("DELETE FROM records WHERE node = ?", (parts[0],))
+        _versions[parts[0]] += 1
+        for key, record in (value or {}).items():
+            _write_record(parts[0], key, record)
+    else:
+        node, key, rest = parts[0], parts[1], parts[2:]
+        _write_record(node, key, _set_in(_read_record(node, key), rest, value) if rest else value)
+
+
+def _read(parts):
+    if not parts:
+        nodes = [r[0] for r in _conn.execute("SELECT DISTINCT node FROM records")]
+        return {node: _read_node(node) for node in nodes} or None
+    if len(parts) == 1:
+        return _read_node(parts[0]) or None
+    value = _read_record(parts[0], parts[1])
+    for part in parts[2:]:
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def version(node):
+    """Changes with this process's writes to ``node``, and for every node when another process has written."""
+    global _data_version, _generation
+    with _lock:
+        current = _conn.execute("PRAGMA data_version").fetchone()[0]
+        if _data_version is not None and current != _data_version:
+            _generation += 1
+        _data_version = current
+        return (_generation, _versions[node])
+
+
+# --- REFERENCE API ---
+def reference(path="/", app=None, url=None):
+    return Reference(_split(path))
+
+
+class Snapshot:
+    def __init__(self, key):
+        self.key = key
+
+
+class Reference:
+    def __init__(self, parts):
+        self._parts = parts
+
+    @property
+    def key(self):
+        return self._parts[-1] if self._parts else None
+
+    @property
+    def path(self):
+        return "/" + "/".join(self._parts)
+
+    def child(self, path):
+        return Reference(self._parts + _split(path))
+
+    def get(self):
+        with _lock:
+            return _read(self._parts)
+
+    def set(self, value):
+        with _lock, _conn:
+            _write(self._parts, value)
+
+    def push(self, value=""):
+        key = new_push_key()
+        with _lock, _conn:
+            _write(self._parts + [key], value)
+        return Snapshot(key)
+
+    def update(self, value):
+        # Like the RTDB: each key is a (possibly nested) path set in one transaction.
+        with _lock, _conn:
+            for path, v in value.items():
+                _write(self._parts + _split(path), v)
+
+    def delete(self):
+        with _lock, _conn:
+            _write(self._parts, None)
+
+    def order_by_key(self):
+        return Query(self._parts)
+
+
+class Query:
+    # order_by_key() queries on a node, answered from the primary key.
+    def __init__(self, parts):
+        self._parts = parts
+        self._start = self._end = None
+        self._first = self._last = None
+
+    def start_at(self, start):
+        self._start = start
+        return self
+
+    def end_at(self, end):
+        self._end = end
+        return self
+
+    def limit_to_first(self, limit):
+        self._first = limit
+        return self
+
+    def limit_to_last(self, limit):
+        self._last = limit
+        return self
+
+    def get(self):
+        sql = "SELECT key, value FROM records WHERE node = ?"
+        params = [self._parts[0]]
+        if self._start is not None:
+            sql += " AND key >= ?"
+            params.append(self._start)
+        if self._end is not None:
+            sql += " AND key <= ?"
+            params.append(self._end)
+        if self._last is not None:
+            sql += " ORDER BY key DESC LIMIT ?"
+            params.append(self._last)
+        else:
+            sql += " ORDER BY key" + (" LIMIT ?" if self._first is not None else "")
+            params += [self._first] if self._first is not None else []
+        with _lock:
+            rows = _conn.execute(sql, params).fetchall()
+        return {k: json.loads(v) for k, v in sorted(rows)}
+
+
+# --- REPOSITORY ---
+class SqlRepository(Repository):
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.synced = threading.Event()
+        self.synced.set()
+        self._cache = {}  # node -> (version, records)
+
+    def get(self, name):
+        current = version(name)
+        cached = self._cache.get(name)
+        if not cached or cached[0] != current:
+            with _lock:
+                cached = self._cache[name] = (current, _read_node(name))
+        return cached[1]
+
+    def version(self, name):
+        return version(name)
+
+    def push(self, name, value):
+        return reference(name).push(value).key
+
+    def update(self, name, key, value):
+        reference(f"{name}/{key}").update(value)
+
+    def update_many(self, paths):
+        reference("/").update(paths)
+
+    def delete(self, name, key):
+        reference(f"{name}/{key}").delete()
+
+    def _select(self, sql, params):
+        with _lock:
+            return _conn.execute(sql, params).fetchall()
+
+    def child_logs(self, child_id, actions=None):
+        rows = self._select("SELECT value FROM records WHERE node = 'logs' AND child_id = ? ORDER BY key", (child_id,))
+        logs = [json.loads(v) for (v,) in rows]
+        return [v for v in logs if actions is None or v.get("action") in actions]
+
+    def child_incidents(self, child_id):
+        rows = self._select("SELECT value FROM records WHERE node = 'incidents' AND child_id = ? ORDER BY key", (child_id,))
+        return [json.loads(v) for (v,) in rows]
+
+    def logs_between(self, start, end):
+        rows = self._select(
+            "SELECT key, value FROM records WHERE node = 'logs' AND at >= ? AND at < ? ORDER BY at, key",
+            (start.isoformat(timespec="minutes"), end.isoformat(timespec="minutes")),
+        )
+        return {k: json.loads(v) for k, v in rows}
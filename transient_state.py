@@ -0,0 +1,65 @@
+# transient_state.py
+# Short-lived flags shared by every session in the process (e.g. "in the
+# bathroom"), each expiring on its own after a fixed time. The number of
+# flags is bounded, so a long-running process never piles up flags for
+# children who have since gone home.
+import threading
+import time
+
+
+class TransientFlags:
+    def __init__(self, ttl_seconds, max_entries=1000):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._expires = {}  # key -> expiry; insertion order is expiry order for flags set with the full ttl
+        self._changes = 0  # bumped whenever a flag is set, cleared or expires
+
+    def _purge(self, now):
+        while self._expires:
+            key, expires = next(iter(self._expires.items()))
+            if expires > now and len(self._expires) <= self.max_entries:
+                break
+            del self._expires[key]
+            self._changes += 1
+
+    def set(self, key, seconds=None):
+        """Set ``key`` for the ttl, or for ``seconds`` when mirroring flags set
+        elsewhere. A shorter ``seconds`` can break the expiry order _purge
+        relies on, so reads also check each flag's own expiry."""
+        now = time.monotonic()
+        with self._lock:
+            self._expires.pop(key, None)
+            self._expires[key] = now + (self.ttl if seconds is None else min(seconds, self.ttl))
+            self._changes += 1
+            self._purge(now)
+
+    def clear(self, key):
+        with self._lock:
+            if self._expires.pop(key, None) is not None:
+                self._changes += 1
+
+    def remaining(self, key):
+        """Seconds until ``key`` expires, or None when it is not set."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            expires = self._expires.get(key)
+        return expires - now if expires and expires > now else None
+
+    def items(self):
+        """(key, seconds left) for every flag, soonest to expire first."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            return [(key, expires - now) for key, expires in self._expires.items() if expires > now]
+
+    def version(self, resolution=60):
+        """Changes when a flag is set, cleared or expires, and every
+        ``resolution`` seconds while any flag is set (for countdowns shown in
+        whole minutes)."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            active = any(expires > now for expires in self._expires.values())
+            return (self._changes, int(now // resolution) if active else None)